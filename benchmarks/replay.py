@@ -0,0 +1,116 @@
+# Imports
+import argparse
+import os
+import time
+
+# Replay without a visible window unless a video driver is chosen
+os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+
+import pygame
+
+from pygame_light2d import LightingEngine, SceneReplay
+
+
+# Stages of LightingEngine.render that are timed, and the methods that run them.
+# The GPU is waited for after each stage, so that its work is timed with the stage.
+STAGES = {
+    'prepare': ('_gather_frame', '_prepare_frame'),
+    'draw_layers': ('_render_draw_layers',),
+    'occluder_sdf': ('_render_occluder_sdf',),
+    'hull_upload': ('_send_hull_data',),
+    'lights': ('_render_to_buf_lt',),
+    'blur': ('_render_aomap',),
+    'composite': ('_render_composite', '_render_background', '_render_foreground'),
+}
+
+
+def time_stages(lights_engine: LightingEngine, timings: dict[str, float]) -> None:
+    # Wrap the stage methods of the engine so that they add their time in ms to timings
+    for stage, methods in STAGES.items():
+        for name in methods:
+            method = getattr(lights_engine, name)
+
+            def timed(*args, _method=method, _stage=stage, **kwargs):
+                t1 = time.perf_counter()
+                result = _method(*args, **kwargs)
+                if _stage != 'prepare':
+                    lights_engine.ctx.finish()
+                timings[_stage] = timings.get(_stage, 0.) + (time.perf_counter() - t1) * 1000
+                return result
+
+            setattr(lights_engine, name, timed)
+
+
+def replay(path: str, max_frames: int | None = None) -> list[dict[str, float]]:
+    recording = SceneReplay(path)
+
+    # Create a headless lighting engine with the recorded resolutions
+    pygame.init()
+    lights_engine = LightingEngine(screen_res=recording.screen_res, native_res=recording.native_res,
+                                   lightmap_res=recording.lightmap_res)
+
+    timings = {}
+    time_stages(lights_engine, timings)
+
+    frames = []
+    for i, frame in enumerate(recording):
+        if i == max_frames:
+            break
+
+        # Time the frame from its recorded state to the display update
+        lights_engine.ctx.finish()
+        timings.clear()
+        t1 = time.perf_counter()
+        recording.apply(lights_engine, frame)
+        lights_engine.ctx.finish()
+
+        # Prepare each frame within its render, so that the stages add up to the frame's time
+        lights_engine.pipelining = False
+        t2 = time.perf_counter()
+        lights_engine.render()
+        pygame.display.flip()
+        lights_engine.ctx.finish()
+        t3 = time.perf_counter()
+
+        frames.append({'replay': (t2 - t1) * 1000,
+                       **{stage: timings.get(stage, 0.) for stage in STAGES},
+                       'render': (t3 - t2) * 1000})
+
+    recording.close()
+    return frames
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay a scene recording and report the time of each frame.')
+    parser.add_argument('recording', help='path of a recording made with LightingEngine.start_recording')
+    parser.add_argument('--frames', type=int, default=None, help='maximum number of frames to replay')
+    parser.add_argument('--worst', type=int, default=10, help='number of slowest frames to list')
+    parser.add_argument('--csv', default=None, help='path of a CSV file to write the timings of every frame to')
+    args = parser.parse_args()
+
+    frames = replay(args.recording, args.frames)
+    if not frames:
+        raise SystemExit('The recording has no frames.')
+    columns = list(frames[0])
+
+    print('======== Replay benchmark ========')
+    print(f'recording: {args.recording}')
+    print(f'frames: {len(frames)}')
+    print()
+    print(f"{'stage':<14}{'avg. ms':>10}{'max. ms':>10}")
+    for column in columns:
+        values = [frame[column] for frame in frames]
+        print(f'{column:<14}{sum(values) / len(values):>10.3f}{max(values):>10.3f}')
+    print()
+
+    print(f'Slowest {min(args.worst, len(frames))} frames:')
+    print(f"{'frame':<8}" + ''.join(f'{column:>14}' for column in columns))
+    slowest = sorted(range(len(frames)), key=lambda i: frames[i]['render'], reverse=True)
+    for i in slowest[:args.worst]:
+        print(f'{i:<8}' + ''.join(f'{frames[i][column]:>14.3f}' for column in columns))
+
+    if args.csv is not None:
+        with open(args.csv, 'w') as f:
+            f.write(','.join(['frame'] + columns) + '\n')
+            for i, frame in enumerate(frames):
+                f.write(','.join([str(i)] + [f'{frame[column]:.4f}' for column in columns]) + '\n')
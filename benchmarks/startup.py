@@ -0,0 +1,68 @@
+# Imports
+import json
+import subprocess
+import sys
+
+
+# Script run in a fresh interpreter, so that nothing is cached between samples
+STARTUP_SCRIPT = '''
+import json
+import time
+
+# pygame is imported by the game either way, so only the package's own imports are timed
+import pygame
+
+t0 = time.perf_counter()
+import pygame_light2d as pl2d
+t1 = time.perf_counter()
+
+pygame.init()
+lights_engine = pl2d.LightingEngine(
+    screen_res=(1280, 720), native_res=(320, 180), lightmap_res=(320, 180))
+t2 = time.perf_counter()
+
+light = pl2d.PointLight(position=(160, 90), power=1., radius=250)
+lights_engine.lights.append(light)
+lights_engine.hulls.append(pl2d.Hull([(125, 50), (200, 50), (200, 125), (125, 125)]))
+lights_engine.clear(255, 255, 255)
+lights_engine.render()
+lights_engine.ctx.finish()
+pygame.display.flip()
+t3 = time.perf_counter()
+
+# A second engine on the same graphics engine reuses the compiled shaders
+pl2d.LightingEngine(screen_res=(1280, 720), native_res=(320, 180),
+                    lightmap_res=(320, 180), graphics=lights_engine.graphics)
+t4 = time.perf_counter()
+
+print(json.dumps({'import': t1 - t0,
+                  'engine': t2 - t1,
+                  'first_frame': t3 - t2,
+                  'second_engine': t4 - t3}))
+'''
+
+
+def benchmark_startup(runs: int) -> dict[str, float]:
+    accum = {}
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT],
+                             check=True, capture_output=True, text=True).stdout
+        timings = json.loads(out.strip().splitlines()[-1])
+        for stage, seconds in timings.items():
+            accum[stage] = accum.get(stage, 0.) + seconds * 1000
+
+    return {stage: ms / runs for stage, ms in accum.items()}
+
+
+if __name__ == '__main__':
+    runs = 10
+
+    print('======== Startup benchmark ========')
+    print(f'fresh processes: {runs}')
+    print('running...')
+    avg_ms = benchmark_startup(runs)
+    print(f"Avg. import time (ms): {avg_ms['import']}")
+    print(f"Avg. engine creation (ms): {avg_ms['engine']}")
+    print(f"Avg. time to first frame (ms): {avg_ms['import'] + avg_ms['engine'] + avg_ms['first_frame']}")
+    print(f"Avg. second engine creation (ms): {avg_ms['second_engine']}")
+    print()
@@ -1,58 +1,82 @@
 # Standard modules
-from importlib import resources
-import enum
-
-
-# Import tests for non-standard modules
-try:
-    import numpy as np
-except ImportError:
-    raise ImportError('Missing package: numpy.')
-except Exception as e:
-    raise ImportError(f'Error importing numpy: {e}')
-
-try:
-    import pygame
-except ImportError:
-    raise ImportError('Missing package: pygame.')
-except Exception as e:
-    raise ImportError(f'Error importing pygame: {e}')
-
-try:
-    import moderngl
-except ImportError:
-    raise ImportError('Missing package: moderngl.')
-except Exception as e:
-    raise ImportError(f'Error importing moderngl: {e}')
-
-try:
-    from OpenGL.GL import glBlitNamedFramebuffer, GL_COLOR_BUFFER_BIT, GL_NEAREST
-except ImportError:
-    raise ImportError('Missing package: OpenGL.')
-except Exception as e:
-    raise ImportError(f'Error importing OpenGL: {e}')
-
-try:
-    from pygame_render import RenderEngine, Layer
-    from pygame_render.util import normalize_color_arguments, denormalize_color
-except ImportError:
-    raise ImportError('Missing package: pygame_render.')
-except Exception as e:
-    raise ImportError(f'Error importing pygame_render: {e}')
+from importlib import import_module
+from importlib.util import find_spec
+
+
+# Check that the non-standard modules are installed without importing them.
+# The heavy imports (pygame, moderngl, PyOpenGL, pygame_render) are deferred
+# until the first object that needs them is accessed, which keeps
+# `import pygame_light2d` cheap for short-lived processes.
+for _package in ('numpy', 'pygame', 'moderngl', 'OpenGL', 'pygame_render'):
+    if find_spec(_package) is None:
+        raise ImportError(f'Missing package: {_package}.')
 
 # Local modules
-from .engine import LightingEngine, DrawLayer
-from .hull import Hull
-from .light import PointLight
+from .camera import Camera
+from .spatial import SpatialHash
+from .viewport import Viewport
+
+# Attributes that are imported lazily, mapped to (module, attribute)
+_lazy_attributes = {
+    'LightingEngine': ('.engine', 'LightingEngine'),
+    'DrawLayer': ('.engine', 'DrawLayer'),
+    'PointLight': ('.light', 'PointLight'),
+    'LightAnimation': ('.animation', 'LightAnimation'),
+    'LightLOD': ('.lod', 'LightLOD'),
+    'LightClustering': ('.clustering', 'LightClustering'),
+    'SceneRecorder': ('.recorder', 'SceneRecorder'),
+    'SceneReplay': ('.recorder', 'SceneReplay'),
+    'Hull': ('.hull', 'Hull'),
+    'DynamicTexture': ('.dynamic_texture', 'DynamicTexture'),
+    'Layer': ('pygame_render', 'Layer'),
+    'NEAREST': ('moderngl', 'NEAREST'),
+    'LINEAR': ('moderngl', 'LINEAR'),
+}
+
+# Aliases of the draw layers
+_draw_layer_aliases = ('BACKGROUND', 'FOREGROUND', 'OCCLUDER', 'EMISSIVE')
+
+
+def __getattr__(name: str):
+    if name in _draw_layer_aliases:
+        value = getattr(__getattr__('DrawLayer'), name)
+    elif name in _lazy_attributes:
+        module_name, attr = _lazy_attributes[name]
+        module = import_module(module_name, __name__)
+        value = getattr(module, attr)
+    else:
+        raise AttributeError(
+            f'module {__name__!r} has no attribute {name!r}')
+
+    # Cache the value so that later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
 
-BACKGROUND = DrawLayer.BACKGROUND
-FOREGROUND = DrawLayer.FOREGROUND
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
-NEAREST = moderngl.NEAREST
-LINEAR = moderngl.LINEAR
 
-__all__ = ['LightingEngine', 'PointLight', 'Hull', 'DrawLayer', 'Layer'
-           'BACKGROUND', 'FOREGROUND', 'NEAREST', 'LINEAR']
+__all__ = ['LightingEngine',
+           'PointLight',
+           'LightAnimation',
+           'LightLOD',
+           'LightClustering',
+           'SceneRecorder',
+           'SceneReplay',
+           'Hull',
+           'DynamicTexture',
+           'Camera',
+           'Viewport',
+           'SpatialHash',
+           'DrawLayer',
+           'Layer',
+           'BACKGROUND',
+           'FOREGROUND',
+           'OCCLUDER',
+           'EMISSIVE',
+           'NEAREST',
+           'LINEAR']
 
 # Version of the pygame_light2d package
 __version__ = '2.1.3'
@@ -0,0 +1,87 @@
+from pygame_render.util import normalize_color_arguments
+
+
+class LightAnimation:
+    """
+    Describes how a point light changes over time. The animation is evaluated on the GPU
+    from the engine's time, and its parameters are only packed again after they change,
+    so animating a light costs no Python work per frame.
+
+    Every effect is disabled by default. The effects are applied to the light's own
+    position, color and power, so these can still be changed from Python.
+
+    The CPU queries of the lighting engine and the visibility polygon mode use the
+    lights without their animation.
+
+    Args:
+        flicker (float, optional): Fraction of the power removed at random, from 0 to 1, like a torch. Default is 0.
+        flicker_speed (float, optional): Number of random flicker values per second. Default is 10.
+        pulse (float, optional): Amplitude of a sine variation of the power, as a fraction of the power. Default is 0.
+        pulse_frequency (float, optional): Frequency of the pulse in Hz. Default is 1.
+        color (tuple[int], optional): Second color (0-255) that the light cycles to and back from. Default is None.
+        color_frequency (float, optional): Frequency of the color cycle in Hz. Default is 1.
+        orbit_radius (float, optional): Radius of a circular orbit around the light's position. Default is 0.
+        orbit_frequency (float, optional): Number of turns of the orbit per second. Default is 1.
+        phase (float, optional): Offset of the periodic effects, as a fraction of a period. Default is 0.
+        seed (int, optional): Seed of the flicker, so that lights flicker differently. Default is 0.
+    """
+
+    def __init__(self, flicker=0., flicker_speed=10., pulse=0., pulse_frequency=1.,
+                 color=None, color_frequency=1., orbit_radius=0., orbit_frequency=1.,
+                 phase=0., seed=0) -> None:
+        """
+        Initialize a light animation.
+
+        Args:
+            flicker (float, optional): Fraction of the power removed at random, from 0 to 1. Default is 0.
+            flicker_speed (float, optional): Number of random flicker values per second. Default is 10.
+            pulse (float, optional): Amplitude of a sine variation of the power, as a fraction of the power. Default is 0.
+            pulse_frequency (float, optional): Frequency of the pulse in Hz. Default is 1.
+            color (tuple[int], optional): RGB or RGBA color (0-255) that the light cycles to and back from. Default is None.
+            color_frequency (float, optional): Frequency of the color cycle in Hz. Default is 1.
+            orbit_radius (float, optional): Radius of a circular orbit around the light's position in world coordinates. Default is 0.
+            orbit_frequency (float, optional): Number of turns of the orbit per second. Default is 1.
+            phase (float, optional): Offset of the periodic effects, as a fraction of a period. Default is 0.
+            seed (int, optional): Seed of the flicker. Default is 0.
+
+        Raises:
+            ValueError: If the flicker is not from 0 to 1, or if the flicker speed is negative.
+        """
+
+        self.flicker = flicker
+        self.flicker_speed = flicker_speed
+        self.pulse = pulse
+        self.pulse_frequency = pulse_frequency
+        self.color = color
+        self.color_frequency = color_frequency
+        self.orbit_radius = orbit_radius
+        self.orbit_frequency = orbit_frequency
+        self.phase = phase
+        self.seed = seed
+
+    def __setattr__(self, name: str, value) -> None:
+        if name == 'flicker' and not 0 <= value <= 1:
+            raise ValueError(f'The flicker must be from 0 to 1, not {value}.')
+        if name == 'flicker_speed' and value < 0:
+            raise ValueError(f'The flicker speed must not be negative: {value}.')
+
+        # Count the changes, so that the lights know when to pack the parameters again
+        object.__setattr__(self, name, value)
+        if name != '_version':
+            object.__setattr__(self, '_version', getattr(self, '_version', 0) + 1)
+
+    def get_params(self, light_color: list[float]) -> tuple:
+        """
+        Get the animation parameters in the layout read by the light shader.
+
+        Args:
+            light_color (list[float]): Normalized color of the animated light.
+
+        Returns:
+            tuple: The flicker, pulse, second color, color frequency, orbit, phase and seed.
+        """
+
+        color = light_color if self.color is None else normalize_color_arguments(tuple(self.color), 0, 0, 255)
+        return (self.flicker, self.flicker_speed, self.pulse, self.pulse_frequency,
+                *color, self.color_frequency, self.orbit_radius, self.orbit_frequency,
+                self.phase, self.seed)
@@ -0,0 +1,52 @@
+class Camera:
+    """
+    Represents the view of the world that the lighting engine renders.
+
+    The view is a rectangle with the size of the native resolution whose top-left
+    corner is at the camera's position. Lights and hulls are given in world
+    coordinates, and the layers are drawn in native coordinates, relative to the view.
+
+    Args:
+        position (tuple[float, float], optional): Position of the top-left corner of the view in world coordinates. Default is (0, 0).
+        size (tuple[float, float], optional): Size of the view in world coordinates, when shown in a `Viewport`.
+            Default is None, the size of the viewport.
+    """
+
+    def __init__(self, position=(0., 0.), size=None) -> None:
+        """
+        Initialize a camera.
+
+        Args:
+            position (tuple[float, float], optional): Position of the top-left corner of the view in world coordinates. Default is (0, 0).
+            size (tuple[float, float], optional): Size of the view in world coordinates, when shown in a `Viewport`.
+                A size larger than the viewport zooms out. Default is None, the size of the viewport.
+        """
+
+        self.position = position
+        self.size = size
+
+    def world_to_native(self, p: tuple[float, float]) -> tuple[float, float]:
+        """
+        Convert a point from world coordinates to native coordinates.
+
+        Args:
+            p (tuple[float, float]): Point in world coordinates.
+
+        Returns:
+            tuple[float, float]: Point in native coordinates.
+        """
+
+        return (p[0] - self.position[0], p[1] - self.position[1])
+
+    def native_to_world(self, p: tuple[float, float]) -> tuple[float, float]:
+        """
+        Convert a point from native coordinates to world coordinates.
+
+        Args:
+            p (tuple[float, float]): Point in native coordinates.
+
+        Returns:
+            tuple[float, float]: Point in world coordinates.
+        """
+
+        return (p[0] + self.position[0], p[1] + self.position[1])
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class LightClustering:
+    """
+    Policy that merges dense groups of small, similarly colored lights, such as particles or
+    crowds of torches, whose individual shadows cannot be told apart.
+
+    The world is divided into a grid, and the lights in the same cell whose colors are close
+    are grouped in a single vectorized pass. The lighting engine replaces each group by one
+    light at the group's center, with their combined power and a radius that encloses them,
+    so the number of lights drawn is bounded by the number of groups.
+
+    Only lights with a radius of at most `max_radius` are merged, and animated lights are kept.
+    Lights that move across the cells change group, so prefer cells larger than the lights.
+
+    Set it as the lighting engine's `light_clustering`, whose `cluster_counts` then hold the
+    number of lights merged and of the groups that replaced them in the last frame. The policy
+    is applied before `light_lod`, and is not used with visibility polygons.
+
+    Args:
+        cell_size (float, optional): Side length of the grid cells in world coordinates. Default is 32.
+        color_tolerance (float, optional): Size of the color bins, in normalized color units. Default is 0.125.
+        max_radius (float, optional): Largest radius in world coordinates of the merged lights. Default is 48.
+    """
+
+    def __init__(self, cell_size=32., color_tolerance=.125, max_radius=48.) -> None:
+        """
+        Initialize a light clustering policy.
+
+        Args:
+            cell_size (float, optional): Side length of the grid cells in world coordinates. Default is 32.
+            color_tolerance (float, optional): Size of the color bins, from 0 to 1. Lights whose RGB colors fall
+                in the same bins can be merged. Default is 0.125.
+            max_radius (float, optional): Largest radius in world coordinates of the merged lights. Default is 48.
+        """
+
+        self.cell_size = cell_size
+        self.color_tolerance = color_tolerance
+        self.max_radius = max_radius
+
+    def group(self, positions: np.ndarray, colors: np.ndarray, flags: np.ndarray | None = None) -> np.ndarray:
+        """
+        Group a set of lights by their grid cell and color bin.
+
+        Args:
+            positions (np.ndarray): Array of shape (N, 2) with the world position of each light.
+            colors (np.ndarray): Array of shape (N, C) with the normalized color of each light.
+            flags (np.ndarray, optional): Array of shape (N,) with an integer that the lights of a group
+                must share. Default is None.
+
+        Returns:
+            np.ndarray: Index of the group of each light, from 0 to the number of groups.
+        """
+
+        cells = np.floor(positions / self.cell_size)
+        bins = np.floor(colors / self.color_tolerance)
+        keys = [cells, bins] if flags is None else [cells, bins, np.reshape(flags, (-1, 1))]
+        keys = np.concatenate(keys, axis=1).astype(np.int64)
+        _, groups = np.unique(keys, axis=0, return_inverse=True)
+        return groups.reshape(-1)
@@ -0,0 +1,138 @@
+import moderngl
+import pygame
+
+
+# Fraction of the surface's area above which the dirty rectangles are uploaded as a whole surface
+_FULL_UPLOAD_RATIO = .5
+
+
+class DynamicTexture:
+    """
+    A texture bound to a pygame surface that is drawn on over time, such as a HUD or text.
+
+    Instead of converting the surface again after each change, mark the changed rectangles
+    with `mark_dirty`. Only these rectangles are uploaded, into the same GPU storage, the next
+    time the texture is used. The rectangles returned by the `pygame.draw` functions and by
+    `Surface.blit` can be passed directly.
+
+    A dynamic texture can be passed to `LightingEngine.render_texture` and
+    `LightingEngine.render_transformed` in place of a texture.
+
+    Args:
+        ctx (moderngl.Context): The ModernGL context to create the texture in.
+        sfc (pygame.Surface): The surface whose pixels are shown by the texture.
+        pixel_buffer (bool, optional): Whether to upload through a pixel buffer. Default is False.
+    """
+
+    def __init__(self, ctx: moderngl.Context, sfc: pygame.Surface, pixel_buffer: bool = False) -> None:
+        """
+        Initialize a dynamic texture and upload the whole surface.
+
+        Args:
+            ctx (moderngl.Context): The ModernGL context to create the texture in.
+            sfc (pygame.Surface): The surface whose pixels are shown by the texture.
+            pixel_buffer (bool, optional): Whether to upload through a pixel buffer, which the driver
+                can copy from without stalling the program. Default is False.
+        """
+
+        self._ctx = ctx
+        self._sfc = sfc
+        self._texture = self._make_texture(sfc.get_size())
+        self._dirty: list[pygame.Rect] = [sfc.get_rect()]
+        self._pbo = ctx.buffer(reserve=4, dynamic=True) if pixel_buffer else None
+
+    @property
+    def surface(self) -> pygame.Surface:
+        """Get the surface whose pixels are shown by the texture."""
+        return self._sfc
+
+    @property
+    def texture(self) -> moderngl.Texture:
+        """Get the texture, without uploading the dirty rectangles."""
+        return self._texture
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """Get the size of the texture."""
+        return self._texture.size
+
+    def mark_dirty(self, rect: pygame.Rect | tuple | None = None) -> None:
+        """
+        Mark a region of the surface as changed, so that it is uploaded the next time the texture is used.
+
+        Args:
+            rect (pygame.Rect | tuple | None, optional): Changed rectangle of the surface. Default is None, the whole surface.
+        """
+
+        bounds = self._sfc.get_rect()
+        rect = bounds if rect is None else pygame.Rect(rect).clip(bounds)
+        if rect.width == 0 or rect.height == 0:
+            return
+
+        # Merge the rectangle with the dirty rectangles that it overlaps, until none overlap
+        while (i := rect.collidelist(self._dirty)) != -1:
+            rect.union_ip(self._dirty.pop(i))
+        self._dirty.append(rect)
+
+    def set_surface(self, sfc: pygame.Surface) -> None:
+        """
+        Bind the texture to another surface, which is uploaded as a whole. The GPU storage is
+        kept if the surface has the same size.
+
+        Args:
+            sfc (pygame.Surface): The new surface.
+        """
+
+        if sfc.get_size() != self._texture.size:
+            filter = self._texture.filter
+            self._texture.release()
+            self._texture = self._make_texture(sfc.get_size())
+            self._texture.filter = filter
+        self._sfc = sfc
+        self._dirty = [sfc.get_rect()]
+
+    def update(self) -> moderngl.Texture:
+        """
+        Upload the dirty rectangles of the surface onto the texture.
+
+        Returns:
+            moderngl.Texture: The up-to-date texture.
+        """
+
+        if not self._dirty:
+            return self._texture
+
+        # Upload the whole surface in one write if most of it changed
+        width, height = self._sfc.get_size()
+        if sum(rect.width * rect.height for rect in self._dirty) > _FULL_UPLOAD_RATIO * width * height:
+            self._dirty = [self._sfc.get_rect()]
+
+        for rect in self._dirty:
+            # Rows are flipped, as the texture's origin is at the bottom
+            data = pygame.image.tostring(self._sfc.subsurface(rect), 'RGBA', True)
+            viewport = (rect.x, height - rect.bottom, rect.width, rect.height)
+            if self._pbo is None:
+                self._texture.write(data, viewport=viewport)
+            else:
+                # Orphan the pixel buffer so that writing it does not wait for the previous upload
+                if self._pbo.size < len(data):
+                    self._pbo.orphan(len(data))
+                else:
+                    self._pbo.orphan()
+                self._pbo.write(data)
+                self._texture.write(self._pbo, viewport=viewport)
+        self._dirty.clear()
+
+        return self._texture
+
+    def release(self) -> None:
+        """Release the GPU storage of the texture."""
+
+        self._texture.release()
+        if self._pbo is not None:
+            self._pbo.release()
+
+    def _make_texture(self, size: tuple[int, int]) -> moderngl.Texture:
+        tex = self._ctx.texture(size, components=4)
+        tex.filter = (moderngl.NEAREST, moderngl.NEAREST)
+        return tex
@@ -1,23 +1,137 @@
-import random
+from concurrent.futures import Future, ThreadPoolExecutor
+import copy
 from enum import Enum
+from functools import cache
 from importlib import resources
+from math import ceil, floor
 import moderngl
 import numpy as np
-# from OpenGL.GL import glBlitNamedFramebuffer, GL_COLOR_BUFFER_BIT, GL_NEAREST, glGetUniformBlockIndex, glUniformBlockBinding
 import pygame
+import time
 import warnings
+import weakref
 
-from pygame_render import RenderEngine
+from pygame_render import Layer, RenderEngine
 from pygame_render.util import normalize_color_arguments, denormalize_color
 
 from pygame_light2d.light import PointLight
-from pygame_light2d.hull import Hull
+from pygame_light2d.lod import LightLOD
+from pygame_light2d.clustering import LightClustering
+from pygame_light2d.recorder import SceneRecorder
+from pygame_light2d.hull import Hull, world_vertices, hull_bounds
+from pygame_light2d.camera import Camera
+from pygame_light2d.viewport import Viewport
+from pygame_light2d.spatial import SpatialHash
 from pygame_light2d.double_buff import DoubleBuff
+from pygame_light2d.dynamic_texture import DynamicTexture
+from pygame_light2d.ring_buff import RingBuff
+from pygame_light2d.query import (hull_edges, light_intensity, occluded_by_edges, segments_occluded,
+                                  visibility_polygon, points_in_polygon)
+
+
+# Compiled shader programs, shared by every lighting engine that renders with
+# the same ModernGL context
+_compiled_shaders = weakref.WeakKeyDictionary()
+
+# Uniform block bindings of the hull buffers in the light shader
+_HULL_V_BINDING = 1
+_HULL_IND_BINDING = 2
+_HULL_LIST_BINDING = 3
+
+# Capacity of the hull uniform blocks in the shaders: hulls, vertices, and
+# references from the viewports to their hulls
+_MAX_HULLS = 256
+_MAX_HULL_VERTICES = 1024
+_MAX_HULL_REFS = 1024
+
+# Layout of the per-instance light attributes in the light shader
+_LIGHT_INSTANCE_FORMAT = '2f 4f 3f 4f 4f 3f 2f/i'
+_LIGHT_INSTANCE_ATTRIBUTES = ('instanceLightPos', 'instanceLightCol', 'instanceLightParams',
+                              'instanceFlickerPulse', 'instanceCycleCol', 'instanceCycleOrbit',
+                              'instancePhaseSeed')
+_LIGHT_INSTANCE_SIZE = 22
+
+
+@cache
+def _read_shader_source(filename: str) -> str:
+    # Shader sources are read once per process
+    return resources.read_text('pygame_light2d', filename)
 
 
 class DrawLayer(Enum):
     BACKGROUND = 1,
     FOREGROUND = 2,
+    OCCLUDER = 3,
+    EMISSIVE = 4,
+
+
+class _NamedLayer:
+    # Extra draw layer composited over the background. A static layer keeps
+    # its content, which covers a region of the world around the camera.
+    def __init__(self, layer, static: bool, draw, margin: tuple[int, int]) -> None:
+        self.layer = layer
+        self.static = static
+        self.draw = draw
+        self.margin = margin
+        self.origin = (0., 0.)
+        self.valid = False
+
+
+class _ViewData:
+    # Lights of a viewport in a frame, and its ranges of the shared hull and light mesh data
+    def __init__(self, origin: tuple[float, float], size: tuple[float, float],
+                 rect: tuple[int, int, int, int], light_instances: bytes, num_lights: int,
+                 first_hull: int = 0, num_hulls: int = 0,
+                 first_vertex: int = 0, num_vertices: int = 0,
+                 low_res_instances: bytes = b'', num_low_res_lights: int = 0) -> None:
+        self.origin = origin
+        self.size = size
+        self.rect = rect
+        self.light_instances = light_instances
+        self.num_lights = num_lights
+        self.low_res_instances = low_res_instances
+        self.num_low_res_lights = num_low_res_lights
+        self.first_hull = first_hull
+        self.num_hulls = num_hulls
+        self.first_vertex = first_vertex
+        self.num_vertices = num_vertices
+
+
+class _FrameInputs:
+    # Copy of the scene state that a frame is prepared from, taken on the main thread so
+    # that the frame can be prepared in the background while the game changes the scene.
+    # Each view is (origin, size, rect, light instances) or, with visibility polygons,
+    # (origin, size, rect, light mesh). The hulls seen by any view are stored once, and
+    # each view lists the indices of its hulls.
+    def __init__(self, origin: np.ndarray, views: list[tuple], hull_vertices: np.ndarray,
+                 hull_counts: np.ndarray, view_hulls: list[list[int]], meshes: bool,
+                 light_clustering: LightClustering | None, light_lod: LightLOD | None) -> None:
+        self.origin = origin
+        self.views = views
+        self.hull_vertices = hull_vertices
+        self.hull_counts = hull_counts
+        self.view_hulls = view_hulls
+        self.meshes = meshes
+        self.light_clustering = light_clustering
+        self.light_lod = light_lod
+
+
+class _FrameData:
+    # Light and hull data of a frame, packed and ready to be sent to the GPU.
+    # Positions are in scene coordinates, relative to the first viewport's camera.
+    def __init__(self, views: list[_ViewData], hull_vertices: bytes, hull_indices: bytes,
+                 hull_list: bytes = b'', light_mesh: bytes = b'',
+                 lod_counts: dict[str, int] | None = None,
+                 cluster_counts: dict[str, int] | None = None,
+                 low_res_scale: float = 1.) -> None:
+        self.views = views
+        self.hull_vertices = hull_vertices
+        self.hull_indices = hull_indices
+        self.hull_list = hull_list
+        self.light_mesh = light_mesh
+        self.lod_counts = lod_counts
+        self.cluster_counts = cluster_counts
+        self.low_res_scale = low_res_scale
 
 
 class LightingEngine:
@@ -28,7 +142,8 @@ class LightingEngine:
                  lightmap_res: tuple[int, int],
                  fullscreen: int | bool = 0, resizable: int | bool = 0,
                  noframe: int | bool = 0, scaled: int | bool = 0,
-                 depth: int = 0, display: int = 0, vsync: int = 0) -> None:
+                 depth: int = 0, display: int = 0, vsync: int = 0,
+                 graphics: RenderEngine | None = None) -> None:
         """
         Initialize the lighting engine.
 
@@ -43,6 +158,9 @@ class LightingEngine:
             depth (int, optional): Depth of the rendering window. Default is 0.
             display (int, optional): The display index to use. Default is 0.
             vsync (int, optional): Set to 1 to enable vertical synchronization, 0 to disable. Default is 0.
+            graphics (RenderEngine, optional): An existing graphics engine to render with. If given, no new window is created,
+                the display arguments are ignored, and the compiled shaders are shared with the other lighting engines
+                that use it. Default is None.
         """
 
         # Initialize private members
@@ -56,12 +174,98 @@ class LightingEngine:
         self.hulls: list[Hull] = []
         self.shadow_blur_radius: int = 3
         self.max_luminosity: float = 2.5
+        self.camera: Camera = Camera()
+
+        # If not empty, each viewport shows the view of its own camera in its region of the
+        # native resolution, lit by the lights and hulls around that view. The viewports share
+        # a single upload of the hulls, and the blur and composite passes.
+        self.viewports: list[Viewport] = []
+
+        # Pack the next frame's lights and hulls in a background thread while the GPU renders
+        # the current one, from a copy of the scene taken at the end of render. Each frame then
+        # shows the scene as it was at the end of the previous call. Stop it with shutdown.
+        self.pipelining: bool = False
+
+        # Time at which the light animations are evaluated on the GPU, or None for the
+        # number of seconds since the engine was created
+        self.time: float | None = None
+
+        # Composite the lit background and the foreground onto the screen in a single
+        # full-screen pass, which also makes clearing the screen unnecessary
+        self.fused_composite: bool = False
+
+        # Level-of-detail policy of the lights, and the number of lights it demoted in each
+        # way in the last frame
+        self.light_lod: LightLOD | None = None
+        self.lod_counts: dict[str, int] = _empty_lod_counts()
+
+        # Policy that merges dense groups of small lights, and the number of lights merged
+        # and of groups that replaced them in the last frame
+        self.light_clustering: LightClustering | None = None
+        self.cluster_counts: dict[str, int] = _empty_cluster_counts()
+
+        # Cast shadows from the pixels drawn onto the OCCLUDER layer, by sphere-tracing a
+        # distance field of the layer built with a jump flood. A softness above 0 (e.g. 8)
+        # softens these shadows without the blur pass.
+        self.occluder_shadows: bool = False
+        self.occluder_softness: float = 0.
+
+        # Draw each light as a mesh of its visibility polygon, computed on the CPU and cached,
+        # so that the light shader does not loop over the hull edges. Not used while
+        # occluder_shadows is enabled.
+        self.visibility_polygons: bool = False
+
+        # Make the pixels drawn onto the EMISSIVE layer glow like lights, over emissive_radius
+        # and in a single pass at lightmap resolution. With emissive_shadows, the hulls block
+        # the glow.
+        self.emissive: bool = False
+        self.emissive_radius: float = 16.
+        self.emissive_power: float = 1.
+        self.emissive_shadows: bool = False
+
+        # Cached visibility polygon of each light
+        self._visibility_cache = weakref.WeakKeyDictionary()
+
+        # Vertex array for the light meshes, created on first use
+        self._vao_lights: moderngl.VertexArray | None = None
+
+        # Extra draw layers by name, in compositing order
+        self._draw_layers: dict[str, _NamedLayer] = {}
+
+        # Lightmap for the lights drawn at reduced resolution, created on first use
+        self._layer_lt_low = None
+
+        # Emissive shader and its vertex array, created on first use
+        self._vao_emissive: moderngl.VertexArray | None = None
+
+        # Fused composite shader, compiled on first use
+        self._prog_composite = None
+
+        # Recorder of the frames, while recording
+        self._recorder: SceneRecorder | None = None
+
+        # Jump flood buffer for the occluder distance field, created on first use
+        self._buf_sdf: DoubleBuff | None = None
+
+        # Time at which the engine was created, from which the light animations are played
+        self._start_time = time.perf_counter()
+
+        # Frame data being prepared in the background when pipelining
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending_frame: Future | None = None
+
+        # Spatial indices of the lights and hulls added with add_light and add_hull
+        cell_size = max(native_res) / 4
+        self._light_index = SpatialHash(cell_size)
+        self._hull_index = SpatialHash(cell_size)
 
         # Initialize shader engine
-        self._graphics = RenderEngine(screen_res[0], screen_res[1],
-                                      fullscreen=fullscreen, resizable=resizable,
-                                      noframe=noframe, scaled=scaled, depth=depth,
-                                      display=display, vsync=vsync)
+        if graphics is None:
+            graphics = RenderEngine(screen_res[0], screen_res[1],
+                                    fullscreen=fullscreen, resizable=resizable,
+                                    noframe=noframe, scaled=scaled, depth=depth,
+                                    display=display, vsync=vsync)
+        self._graphics = graphics
 
         # Load shaders
         self._load_shaders()
@@ -69,28 +273,40 @@ class LightingEngine:
         # Create render textures and corresponding FBOs
         self._create_frame_buffers()
 
-        # Create SSBO for hull vertices
+        # Create SSBOs for hull vertices
         self._create_ssbos()
 
     def _load_shaders(self):
-        # Read source files
-        package_name = 'pygame_light2d'
-        vertex_src = resources.read_text(
-            package_name, 'vertex.glsl')
-        fragment_src_light = resources.read_text(
-            package_name, 'fragment_light.glsl')
-        fragment_src_blur = resources.read_text(
-            package_name, 'fragment_blur.glsl')
-        fragment_src_mask = resources.read_text(
-            package_name, 'fragment_mask.glsl')
-
         # Create shader programs
-        self._prog_light = self._graphics.make_shader(vertex_src=vertex_src,
-                                                      fragment_src=fragment_src_light)
-        self._prog_blur = self._graphics.make_shader(vertex_src=vertex_src,
-                                                     fragment_src=fragment_src_blur)
-        self._prog_mask = self._graphics.make_shader(vertex_src=vertex_src,
-                                                     fragment_src=fragment_src_mask)
+        self._prog_light = self._make_shader('fragment_light.glsl', 'vertex_light.glsl')
+        self._prog_blur = self._make_shader('fragment_blur.glsl')
+        self._prog_mask = self._make_shader('fragment_mask.glsl')
+
+        # Assign the bindings of the hull buffers
+        self._prog_light.program['hullVSSBO'].binding = _HULL_V_BINDING
+        self._prog_light.program['hullIndSSBO'].binding = _HULL_IND_BINDING
+        self._prog_light.program['hullListSSBO'].binding = _HULL_LIST_BINDING
+
+        # Quad covering the viewport, drawn once per light as an instance
+        self._vbo_quad = self.ctx.buffer(np.array([-1., -1., 0., 0.,
+                                                   1., -1., 1., 0.,
+                                                   -1., 1., 0., 1.,
+                                                   1., 1., 1., 1.], dtype=np.float32))
+        self._vbo_light_instances = self.ctx.buffer(reserve=4, dynamic=True)
+        self._vao_quad = self.ctx.vertex_array(
+            self._prog_light.program,
+            [(self._vbo_quad, '2f 2f', 'vertexPos', 'vertexTexCoord'),
+             (self._vbo_light_instances, _LIGHT_INSTANCE_FORMAT, *_LIGHT_INSTANCE_ATTRIBUTES)])
+
+    def _make_shader(self, fragment_filename: str, vertex_filename: str = 'vertex.glsl'):
+        # Reuse the shader compiled by another engine on the same context
+        shaders = _compiled_shaders.setdefault(self.ctx, {})
+        key = (vertex_filename, fragment_filename)
+        if key not in shaders:
+            shaders[key] = self._graphics.make_shader(
+                vertex_src=_read_shader_source(vertex_filename),
+                fragment_src=_read_shader_source(fragment_filename))
+        return shaders[key]
 
     def _create_frame_buffers(self):
         # Frame buffers
@@ -98,9 +314,15 @@ class LightingEngine:
             self._native_res, components=4)
         self._layer_fg = self._graphics.make_layer(
             self._native_res, components=4)
+        self._layer_occ = self._graphics.make_layer(
+            self._native_res, components=4)
+        self._layer_em = self._graphics.make_layer(
+            self._native_res, components=4)
 
-        # Double buffer for lights
-        self._buf_lt = DoubleBuff(self._graphics, self._lightmap_res)
+        # Lightmap, onto which the lights are added
+        self._layer_lt = self._graphics.make_layer(
+            self._lightmap_res, components=4, dtype='f2')
+        self._layer_lt.texture.filter = (moderngl.LINEAR, moderngl.LINEAR)
 
         # Ambient occlussion map
         self._layer_ao = self._graphics.make_layer(
@@ -108,28 +330,28 @@ class LightingEngine:
         self._layer_ao.texture.filter = (moderngl.LINEAR, moderngl.LINEAR)
 
         # Disable texture wrapping
-        self._buf_lt._layer1.texture.repeat_x = False
-        self._buf_lt._layer1.texture.repeat_y = False
-        self._buf_lt._layer2.texture.repeat_x = False
-        self._buf_lt._layer2.texture.repeat_y = False
+        self._layer_lt.texture.repeat_x = False
+        self._layer_lt.texture.repeat_y = False
         self._layer_ao.texture.repeat_x = False
         self._layer_ao.texture.repeat_y = False
         self._layer_bg.texture.repeat_x = False
         self._layer_bg.texture.repeat_y = False
         self._layer_fg.texture.repeat_x = False
         self._layer_fg.texture.repeat_y = False
+        self._layer_occ.texture.repeat_x = False
+        self._layer_occ.texture.repeat_y = False
+        self._layer_em.texture.repeat_x = False
+        self._layer_em.texture.repeat_y = False
 
     def _create_ssbos(self, max_num_hulls=1024):
-        # Create SSBOs
-        self._graphics.reserve_uniform_block(
-            shader=self._prog_light,
-            ubo_name='hullVSSBO',
-            nbytes=6*8*max_num_hulls)
-
-        self._graphics.reserve_uniform_block(
-            shader=self._prog_light,
-            ubo_name='hullIndSSBO',
-            nbytes=8*max_num_hulls)
+        # Create SSBOs. Each one is a ring of buffers, so that uploading a
+        # frame's hulls does not wait for the GPU to finish the previous frames.
+        self._ssbo_hull_v = RingBuff(self.ctx, nbytes=6*8*max_num_hulls,
+                                     binding=_HULL_V_BINDING)
+        self._ssbo_hull_ind = RingBuff(self.ctx, nbytes=8*max_num_hulls,
+                                       binding=_HULL_IND_BINDING)
+        self._ssbo_hull_list = RingBuff(self.ctx, nbytes=4*_MAX_HULL_REFS,
+                                        binding=_HULL_LIST_BINDING)
 
     @property
     def graphics(self) -> RenderEngine:
@@ -141,12 +363,311 @@ class LightingEngine:
         """Get the ModernGL rendering context."""
         return self._graphics.ctx
 
-    def set_filter(self, layer: DrawLayer, filter: tuple) -> None:
+    def add_light(self, light: PointLight) -> None:
+        """
+        Add a light to the engine's spatial index.
+
+        Unlike the lights in `lights`, indexed lights are only processed when they
+        light up the camera's view, so large worlds cost the same as a single screen.
+        Call `update_light` after moving or resizing an indexed light.
+
+        Args:
+            light (PointLight): The light to add.
+        """
+        self._light_index.insert(light, light.get_bounds())
+
+    def remove_light(self, light: PointLight) -> None:
+        """
+        Remove a light from the engine's spatial index.
+
+        Args:
+            light (PointLight): The light to remove.
+        """
+        self._light_index.remove(light)
+
+    def update_light(self, light: PointLight) -> None:
+        """
+        Update the spatial index after an indexed light has been moved or resized.
+
+        Args:
+            light (PointLight): The light that changed.
+        """
+        self._light_index.insert(light, light.get_bounds())
+
+    def add_hull(self, hull: Hull) -> None:
+        """
+        Add a hull to the engine's spatial index.
+
+        Unlike the hulls in `hulls`, indexed hulls are only processed when they
+        can cast shadows onto the camera's view.
+        Call `update_hull` after changing the vertices or the transform of an indexed hull.
+
+        Args:
+            hull (Hull): The hull to add.
+        """
+        self._hull_index.insert(hull, hull.get_bounds())
+
+    def remove_hull(self, hull: Hull) -> None:
+        """
+        Remove a hull from the engine's spatial index.
+
+        Args:
+            hull (Hull): The hull to remove.
+        """
+        self._hull_index.remove(hull)
+
+    def update_hull(self, hull: Hull) -> None:
+        """
+        Update the spatial index after the vertices or the transform of an indexed hull have changed.
+
+        Args:
+            hull (Hull): The hull that changed.
+        """
+        self._hull_index.insert(hull, hull.get_bounds())
+
+    def query_lights(self, bounds: tuple[float, float, float, float]) -> list[PointLight]:
+        """
+        Find the enabled lights whose area overlaps a region of the world.
+
+        Args:
+            bounds (tuple[float, float, float, float]): The region (x0, y0, x1, y1) in world coordinates.
+
+        Returns:
+            list[PointLight]: The lights in `lights` followed by the indexed lights.
+        """
+        lights = [light for light in self.lights
+                  if light.enabled and _overlaps(light.get_bounds(), bounds)]
+        lights += [light for light in self._light_index.query(bounds)
+                   if light.enabled]
+        return lights
+
+    def query_hulls(self, bounds: tuple[float, float, float, float]) -> list[Hull]:
+        """
+        Find the enabled hulls that overlap a region of the world.
+
+        Args:
+            bounds (tuple[float, float, float, float]): The region (x0, y0, x1, y1) in world coordinates.
+
+        Returns:
+            list[Hull]: The hulls in `hulls` followed by the indexed hulls.
+        """
+        hulls = [hull for hull in self.hulls if hull.enabled and len(hull.vertices) > 0]
+        if hulls:
+            x0, y0, x1, y1 = hull_bounds(hulls).T
+            inside = ((x0 <= bounds[2]) & (bounds[0] <= x1) &
+                      (y0 <= bounds[3]) & (bounds[1] <= y1))
+            hulls = [hull for hull, keep in zip(hulls, inside) if keep]
+        hulls += [hull for hull in self._hull_index.query(bounds)
+                  if hull.enabled]
+        return hulls
+
+    def query_light(self, points: np.ndarray,
+                    lights: list[PointLight] | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Compute on the CPU how lit a set of points are, without reading back from the GPU.
+
+        The lights are evaluated with the same falloff and hull shadows as the light shader,
+        vectorized over the pairs of points and lights within the lights' radii and the hull
+        edges at once, in chunks of bounded memory. Shadows of the occluder layer are not taken into account.
+
+        Args:
+            points (np.ndarray): Array of shape (N, 2) with points in world coordinates.
+            lights (list[PointLight], optional): The lights to evaluate. If None, the enabled lights
+                that reach the points are found with `query_lights`. Default is None.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Array of shape (N, 4) with the RGBA light value of each
+                point as in the unblurred lightmap (before clamping and adding the ambient light), and boolean
+                array of shape (N, M) telling whether each point is in the shadow of each of the M lights.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+        # Lights that may reach the points
+        if lights is None:
+            if len(points) == 0:
+                lights = []
+            else:
+                x0, y0 = points.min(axis=0)
+                x1, y1 = points.max(axis=0)
+                lights = self.query_lights((x0, y0, x1, y1))
+
+        # Edges of the hulls that may cast shadows
+        shadow_lights = [light for light in lights if light.cast_shadows]
+        if shadow_lights:
+            bounds = np.array([light.get_bounds() for light in shadow_lights])
+            edges = hull_edges(self.query_hulls(
+                (*bounds[:, :2].min(axis=0), *bounds[:, 2:].max(axis=0))))
+        else:
+            edges = np.zeros((0, 2, 2))
+
+        # Attributes of the lights, shape (M, ...)
+        positions = np.array([light.position for light in lights], dtype=np.float64).reshape(-1, 2)
+        radii = np.array([light.radius for light in lights], dtype=np.float64)
+        powers = np.array([light.power for light in lights], dtype=np.float64)
+        colors = np.array([light._color for light in lights], dtype=np.float64).reshape(-1, 4)
+        casts = np.array([light.cast_shadows for light in lights], dtype=bool)
+
+        # Point-light pairs within the lights' radii, shape (N, M)
+        dist = np.hypot(points[:, 0, None] - positions[:, 0], points[:, 1, None] - positions[:, 1])
+        inside = dist < radii
+
+        # Test the segments of the pairs of the shadow-casting lights against the hull
+        # edges, for all the lights at once
+        occluded = np.zeros((len(points), len(lights)), dtype=bool)
+        pairs = np.nonzero(inside & casts)
+        occluded[pairs] = segments_occluded(points[pairs[0]], positions[pairs[1]], edges)
+
+        # Blend the light colors: each light adds its color times its alpha, and its alpha
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = np.where(inside & ~occluded, light_intensity(dist, radii), 0.) * powers
+        illumination = np.zeros((len(points), 4))
+        illumination[:, :3] = (value * value) @ (colors[:, :3] * colors[:, 3:4])
+        illumination[:, 3] = value @ colors[:, 3]
+
+        # The light buffer is alpha blended onto the lightmap
+        illumination[:, :3] *= illumination[:, 3:4]
+
+        return illumination, occluded
+
+    def get_visibility_polygon(self, light: PointLight) -> np.ndarray:
+        """
+        Get the region visible from a light, bounded by the square enclosing its radius.
+
+        The polygon is cached, and only recomputed when the light or the hulls within its
+        radius change.
+
+        Args:
+            light (PointLight): The light.
+
+        Returns:
+            np.ndarray: Read-only array of shape (K, 2) with the vertices of the polygon in world
+                coordinates, sorted by angle around the light.
+        """
+        position = tuple(light.position)
+        if light.cast_shadows:
+            edges = hull_edges(self.query_hulls(light.get_bounds()))
+        else:
+            edges = np.zeros((0, 2, 2))
+
+        # Reuse the cached polygon if nothing has changed
+        cached = self._visibility_cache.get(light)
+        if (cached is not None and cached[0] == position and cached[1] == light.radius
+                and np.array_equal(cached[2], edges)):
+            return cached[3]
+
+        polygon = visibility_polygon(position, light.radius, edges)
+        polygon.flags.writeable = False
+        self._visibility_cache[light] = (position, light.radius, edges, polygon)
+        return polygon
+
+    def in_line_of_sight(self, light: PointLight, points: np.ndarray) -> np.ndarray:
+        """
+        Test which points are within a light's radius and not hidden from it by hulls,
+        using the light's visibility polygon.
+
+        Args:
+            light (PointLight): The light.
+            points (np.ndarray): Array of shape (N, 2) with points in world coordinates.
+
+        Returns:
+            np.ndarray: Boolean array of shape (N,), True for the points in line of sight.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        dist = np.hypot(points[:, 0] - light.position[0],
+                        points[:, 1] - light.position[1])
+        polygon = self.get_visibility_polygon(light)
+        return (dist < light.radius) & points_in_polygon(points, polygon)
+
+    def start_recording(self, file) -> SceneRecorder:
+        """
+        Start recording the frames into a binary log that can be replayed with `SceneReplay`.
+
+        Every call to `render` records the lights, hulls, viewports and settings of the frame,
+        and the calls to `clear`, `render_texture` and `render_transformed` made before it.
+        The log is delta-encoded and compressed, so it can be left running during play.
+
+        Args:
+            file (str | os.PathLike | BinaryIO): Path or binary file to write the recording to.
+
+        Returns:
+            SceneRecorder: The recorder, which counts the recorded frames.
+        """
+
+        self.stop_recording()
+        self._recorder = SceneRecorder(self, file)
+        return self._recorder
+
+    def stop_recording(self) -> None:
+        """Stop recording the frames and close the recording. Does nothing if not recording."""
+
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
+
+    def add_draw_layer(self, name: str, static: bool = False, draw=None, margin: float = .25) -> None:
+        """
+        Add a named draw layer.
+
+        Named layers are composited over the `BACKGROUND` layer in the order in which they were
+        added, and lit with it. Draw onto them by passing their name as the layer.
+
+        A dynamic layer is cleared by `clear` like the other layers, and is drawn in native
+        coordinates like the background, so with `viewports` each viewport's content is drawn
+        inside its region. A static layer keeps its content between frames, drawn in world
+        coordinates, which covers the views of the camera or of the viewports and a margin
+        around them. It is redrawn by calling `draw` only when it is invalidated with
+        `invalidate_draw_layer`, or when a view moves outside of the covered region, which
+        grows if the views do not fit in it. `draw` receives the position of the covered
+        region's top-left corner in world coordinates, and should draw the content relative to it.
+
+        Args:
+            name (str): Name of the layer.
+            static (bool, optional): Whether the layer is static. Default is False.
+            draw (Callable[[tuple[float, float]], None], optional): Function that draws the content of a static layer.
+                Default is None.
+            margin (float, optional): Margin around the views covered by a static layer, as a fraction of
+                the native resolution. Default is 0.25.
+
+        Raises:
+            ValueError: If a layer with the same name exists, or if a static layer has no `draw` function.
+        """
+
+        if name in self._draw_layers:
+            raise ValueError(f'Draw layer {name!r} already exists.')
+        if static and draw is None:
+            raise ValueError('A static draw layer needs a draw function.')
+
+        margin_px = (round(self._native_res[0] * margin), round(self._native_res[1] * margin)) if static else (0, 0)
+        layer = self._make_named_layer((self._native_res[0] + 2 * margin_px[0],
+                                        self._native_res[1] + 2 * margin_px[1]))
+        self._draw_layers[name] = _NamedLayer(layer, static, draw, margin_px)
+
+    def remove_draw_layer(self, name: str) -> None:
+        """
+        Remove a named draw layer and release its texture.
+
+        Args:
+            name (str): Name of the layer.
+        """
+
+        self._draw_layers.pop(name).layer.release()
+
+    def invalidate_draw_layer(self, name: str) -> None:
+        """
+        Mark the content of a static draw layer as outdated, so that it is redrawn in the next frame.
+
+        Args:
+            name (str): Name of the layer.
+        """
+
+        self._draw_layers[name].valid = False
+
+    def set_filter(self, layer: DrawLayer | str, filter: tuple) -> None:
         """
         Set the filter for a specific layer's texture.
 
         Args:
-            layer (Layer): The layer to apply the filter to.
+            layer (DrawLayer | str): The layer to apply the filter to, or the name of a draw layer.
             filter (tuple[Constant, Constant]): The filter to apply to the texture, can be `NEAREST` or `LINEAR`.
         """
         self._get_layer(layer).texture.filter = filter
@@ -181,13 +702,13 @@ class LightingEngine:
         """
         return denormalize_color(self._ambient)
 
-    def blit_texture(self, tex: moderngl.Texture, layer: DrawLayer, dest: pygame.Rect, source: pygame.Rect):
+    def blit_texture(self, tex: moderngl.Texture, layer: DrawLayer | str, dest: pygame.Rect, source: pygame.Rect):
         """
         Blit a texture onto a specified layer's framebuffer.
 
         Args:
             tex (moderngl.Texture): Texture to blit.
-            layer (Layer): Layer to blit the texture onto.
+            layer (DrawLayer | str): Layer to blit the texture onto, or the name of a draw layer.
             dest (pygame.Rect): Destination rectangle.
             source (pygame.Rect): Source rectangle from the texture.
         """
@@ -206,17 +727,23 @@ class LightingEngine:
             'blit_texture is deprecated, please use render_texture', UserWarning)
         self.render_texture(tex, layer, dest, source)
 
-    def render_texture(self, tex: moderngl.Texture, layer: DrawLayer, dest: pygame.Rect, source: pygame.Rect):
+    def render_texture(self, tex: moderngl.Texture | DynamicTexture, layer: DrawLayer | str,
+                       dest: pygame.Rect, source: pygame.Rect):
         """
         Render a texture onto a specified layer's framebuffer using the draw shader.
 
         Args:
-            tex (moderngl.Texture): Texture to render.
-            layer (Layer): Layer to render the texture onto.
+            tex (moderngl.Texture | DynamicTexture): Texture to render. The changes of a dynamic texture are uploaded first.
+            layer (DrawLayer | str): Layer to render the texture onto, or the name of a draw layer.
             dest (pygame.Rect): Destination rectangle.
             source (pygame.Rect): Source rectangle from the texture.
         """
 
+        if isinstance(tex, DynamicTexture):
+            tex = tex.update()
+        if self._recorder is not None:
+            self._recorder.record_texture(tex, layer, dest, source)
+
         # Render texture onto layer with the draw shader
         layer = self._get_layer(layer)
         dest_vertices = [(dest.x + dest.width, dest.y + dest.height),
@@ -230,7 +757,7 @@ class LightingEngine:
         self._graphics.render_from_vertices(
             tex, layer, dest_vertices, section_vertices)
 
-    def render_transformed(self, tex: moderngl.Texture, layer: DrawLayer,
+    def render_transformed(self, tex: moderngl.Texture | DynamicTexture, layer: DrawLayer | str,
                            position: tuple[float, float] = (0, 0),
                            scale: tuple[float, float] | float = (1.0, 1.0),
                            angle: float = 0.0,
@@ -240,14 +767,19 @@ class LightingEngine:
         Render a transformed texture onto a specified layer's framebuffer using the draw shader.
 
         Args:
-            tex (moderngl.Texture): Texture to render.
-            layer (Layer): Layer to render the texture onto.
+            tex (moderngl.Texture | DynamicTexture): Texture to render. The changes of a dynamic texture are uploaded first.
+            layer (DrawLayer | str): Layer to render the texture onto, or the name of a draw layer.
             position (tuple[float, float]): The position (x, y) where the texture will be rendered. Default is (0, 0).
             scale (tuple[float, float] | float): The scaling factor for the texture. Can be a tuple (x, y) or a scalar. Default is (1.0, 1.0).
             angle (float): The rotation angle in degrees. Default is 0.0.
             flip (tuple[bool, bool] | bool): Whether to flip the texture. Can be a tuple (flip x axis, flip y axis) or a boolean (flip x axis). Default is (False, False).
             section (pygame.Rect | None): The section of the texture to render. If None, the entire texture is rendered. Default is None.
         """
+        if isinstance(tex, DynamicTexture):
+            tex = tex.update()
+        if self._recorder is not None:
+            self._recorder.record_transformed(tex, layer, position, scale, angle, flip, section)
+
         layer = self._get_layer(layer)
         self._graphics.render(tex, layer, position,
                               scale, angle, flip, section)
@@ -265,6 +797,24 @@ class LightingEngine:
 
         return self._graphics.surface_to_texture(sfc)
 
+    def make_dynamic_texture(self, sfc: pygame.Surface, pixel_buffer: bool = False) -> DynamicTexture:
+        """
+        Create a texture bound to a pygame.Surface that is changed over time.
+
+        After drawing onto the surface, mark the changed rectangles with `DynamicTexture.mark_dirty`.
+        Only these are uploaded when the texture is next rendered, and the GPU storage is reused,
+        unlike converting the surface again with `surface_to_texture`.
+
+        Args:
+            sfc (pygame.Surface): Surface whose pixels are shown by the texture.
+            pixel_buffer (bool, optional): Whether to upload the changes through a pixel buffer. Default is False.
+
+        Returns:
+            DynamicTexture: The dynamic texture. Call `DynamicTexture.release` when it is no longer needed.
+        """
+
+        return DynamicTexture(self.ctx, sfc, pixel_buffer)
+
     def load_texture(self, path: str) -> moderngl.Texture:
         """
         Load a texture from a file.
@@ -288,108 +838,607 @@ class LightingEngine:
             B (int): Blue component value (0-255).
             A (int): Alpha component value (0-255).
         """
+        if self._recorder is not None:
+            self._recorder.record_clear(normalize_color_arguments(R, G, B, A))
+
         self._layer_bg.clear(R, G, B, A)
         self._layer_fg.clear(0, 0, 0, 0)
+        for named in self._draw_layers.values():
+            if not named.static:
+                named.layer.clear(0, 0, 0, 0)
+        if self.occluder_shadows:
+            self._layer_occ.clear(0, 0, 0, 0)
+        if self.emissive:
+            self._layer_em.clear(0, 0, 0, 0)
 
     def render(self):
         """
         Render the lighting effects onto the screen.
 
-        Clears intermediate buffers, renders lights onto the double buffer,
+        Clears intermediate buffers, adds the lights onto the lightmap,
         blurs the lightmap for soft shadows, and renders background and foreground.
 
         This method is responsible for the final rendering of lighting effects onto the screen.
         """
 
-        # Clear intermediate buffers
-        self._graphics.screen.clear(0, 0, 0, 1)
-        self._layer_ao.clear(0, 0, 0, 0)
-        self._buf_lt.clear(0, 0, 0, 0)
+        if self._recorder is not None:
+            self._recorder.record_frame()
+
+        # Take the frame data prepared in the background, or prepare it now. The pending
+        # frame is dropped first, so that a failed preparation is not raised again.
+        views = self._get_views()
+        pending, self._pending_frame = self._pending_frame, None
+        if pending is not None:
+            frame = pending.result()
+        else:
+            frame = self._prepare_frame(self._gather_frame(views))
+
+        # Clear intermediate buffers. The aomap is overwritten by the blur pass,
+        # and the screen by the fused composite pass.
+        if not self.fused_composite:
+            self._graphics.screen.clear(0, 0, 0, 1)
+        self._layer_lt.clear(0, 0, 0, 0)
+
+        # Composite the named draw layers over the background
+        if self._draw_layers:
+            self._render_draw_layers(views)
+
+        # Build the distance field of the occluder layer
+        if self.occluder_shadows:
+            self._render_occluder_sdf()
 
         # Send hull data to SSBOs
-        self._send_hull_data()
+        self._send_hull_data(frame)
 
-        # Render lights onto double buffer
-        self._render_to_buf_lt()
+        # Render lights onto the lightmap
+        self._render_to_buf_lt(frame)
+        self.lod_counts = frame.lod_counts or _empty_lod_counts()
+        self.cluster_counts = frame.cluster_counts or _empty_cluster_counts()
 
         # Blur lightmap for soft shadows and render onto aomap
         self._render_aomap()
 
-        # Render background masked with the lightmap
-        self._render_background()
+        if self.fused_composite:
+            # Render background masked with the lightmap and foreground in one pass
+            self._render_composite()
+        else:
+            # Render background masked with the lightmap
+            self._render_background()
+
+            # Render foreground onto screen
+            self._render_foreground()
+
+        # Prepare the next frame's data while the GPU renders this one, from
+        # a copy of the scene taken now
+        if self.pipelining:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+            self._pending_frame = self._executor.submit(self._prepare_frame, self._gather_frame(views))
+
+    def shutdown(self) -> None:
+        """
+        Stop the background thread used by `pipelining`, after the frame that it is preparing.
 
-        # Render foreground onto screen
-        self._render_foreground()
+        The engine can still render afterwards, and starts a new thread if `pipelining` is enabled.
+        """
 
-    def _point_to_uv(self, p: tuple[float, float]):
-        return [p[0]/self._native_res[0], 1 - (p[1]/self._native_res[1])]
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _get_views(self) -> list[tuple]:
+        # Camera position, view size and native region of each viewport, copied so
+        # that the frame can be prepared in the background
+        viewports = self.viewports or [
+            Viewport(self.camera, (0, 0, self._native_res[0], self._native_res[1]))]
+        return [(tuple(viewport.camera.position), tuple(viewport.get_view_size()),
+                 tuple(viewport.rect)) for viewport in viewports]
+
+    def _get_view_bounds(self, position: tuple[float, float], size: tuple[float, float],
+                         margin: float = 0.):
+        x, y = position
+        return (x - margin, y - margin, x + size[0] + margin, y + size[1] + margin)
+
+    def _gather_visible(self, position: tuple[float, float], size: tuple[float, float]):
+        # Lights whose area overlaps the view
+        lights = self.query_lights(self._get_view_bounds(position, size))
+
+        # Hulls can only cast shadows onto the view if they are within the
+        # radius of a shadow-casting light
+        radii = [light.radius for light in lights if light.cast_shadows]
+        if self.emissive and self.emissive_shadows:
+            radii.append(self.emissive_radius)
+        if not radii:
+            return lights, []
+        hulls = self.query_hulls(
+            self._get_view_bounds(position, size, margin=max(radii)))
+
+        return lights, hulls
+
+    def _gather_frame(self, views: list[tuple]) -> _FrameInputs:
+        # Copy the lights and hulls that affect each view into arrays. This reads the
+        # live scene, so it runs on the main thread.
+        # Positions are sent relative to the first camera, to keep their precision.
+        origin = np.array(views[0][0], dtype=np.float64)
+        meshes = self.visibility_polygons and not self.occluder_shadows
+
+        view_inputs = []
+        hull_ids = {}
+        view_hulls = []
+        for position, size, rect in views:
+            if meshes:
+                # Draw the lights as meshes of their visibility polygons. The hulls are
+                # then only read by the emissive glow, if the hulls block it.
+                lights = self.query_lights(self._get_view_bounds(position, size))
+                visible_hulls = []
+                if self.emissive and self.emissive_shadows:
+                    visible_hulls = self.query_hulls(
+                        self._get_view_bounds(position, size, margin=self.emissive_radius))
+                view_inputs.append((tuple(position - origin), size, rect,
+                                    self._build_light_mesh(lights, origin)))
+            else:
+                view_lights, visible_hulls = self._gather_visible(position, size)
+                view_inputs.append((tuple(position - origin), size, rect,
+                                    self._pack_lights(view_lights, origin)))
+            view_hulls.append([hull_ids.setdefault(hull, len(hull_ids)) for hull in visible_hulls])
+
+        # Vertices in world coordinates of the hulls seen by any view, each one once
+        vertices, counts = world_vertices(list(hull_ids))
+
+        # The light policies are not used with visibility polygons
+        light_clustering = None if meshes else copy.copy(self.light_clustering)
+        light_lod = None if meshes else copy.copy(self.light_lod)
+
+        return _FrameInputs(origin, view_inputs, vertices, counts, view_hulls, meshes,
+                            light_clustering, light_lod)
+
+    def _prepare_frame(self, inputs: _FrameInputs) -> _FrameData:
+        # Pack a frame's data for the GPU. This only reads the copy of the scene in
+        # the inputs, so it can run in the background.
+        origin = inputs.origin
+
+        # Keep the hulls that fit in the shader's uniform blocks
+        ends = np.cumsum(inputs.hull_counts, dtype=np.int32)
+        num_kept = min(_MAX_HULLS, int(np.searchsorted(ends, _MAX_HULL_VERTICES, side='right')))
+        if num_kept < len(ends):
+            warnings.warn(f'The visible hulls exceed the capacity of {_MAX_HULLS} hulls and '
+                          f'{_MAX_HULL_VERTICES} vertices, and {len(ends) - num_kept} of them are ignored.')
+            ends = ends[:num_kept]
+
+        # The hulls are uploaded once, and each view draws its own list of them
+        view_data = []
+        hull_list = []
+        lod_counts = _empty_lod_counts()
+        cluster_counts = _empty_cluster_counts()
+        first_vertex = 0
+        for (position, size, rect, instances), hull_ids in zip(inputs.views, inputs.view_hulls):
+            hull_ids = [i for i in hull_ids if i < num_kept]
+            if len(hull_list) + len(hull_ids) > _MAX_HULL_REFS:
+                warnings.warn(f'The hulls of the viewports exceed the capacity of {_MAX_HULL_REFS} '
+                              'references, and the excess ones are ignored.')
+                hull_ids = hull_ids[:_MAX_HULL_REFS - len(hull_list)]
+
+            if inputs.meshes:
+                # The light meshes of all the views are drawn from one vertex buffer
+                view_data.append(_ViewData(position, size, rect, b'', 0,
+                                           first_hull=len(hull_list), num_hulls=len(hull_ids),
+                                           first_vertex=first_vertex, num_vertices=len(instances)))
+                first_vertex += len(instances)
+                hull_list += hull_ids
+                continue
 
-    def _get_layer(self, layer: DrawLayer):
-        if layer == DrawLayer.BACKGROUND:
+            # Merge the dense groups of small lights
+            if inputs.light_clustering is not None:
+                instances = self._apply_clustering(instances, origin, inputs.light_clustering, cluster_counts)
+
+            # Lower the level of detail of the lights that contribute little
+            low_res = instances[:0]
+            if inputs.light_lod is not None:
+                instances, low_res = self._apply_lod(instances, size, rect, inputs.light_lod, lod_counts)
+
+            view_data.append(_ViewData(position, size, rect,
+                                       instances.tobytes(), len(instances),
+                                       first_hull=len(hull_list), num_hulls=len(hull_ids),
+                                       low_res_instances=low_res.tobytes(),
+                                       num_low_res_lights=len(low_res)))
+            hull_list += hull_ids
+
+        # Hull vertices in scene coordinates, and the index past each hull's last vertex
+        vertices = inputs.hull_vertices[:ends[-1] if len(ends) else 0] - origin
+        light_mesh = b''
+        if inputs.meshes:
+            light_mesh = np.concatenate([mesh for *_, mesh in inputs.views]).tobytes()
+
+        return _FrameData(view_data,
+                          hull_vertices=vertices.astype(np.float32).tobytes(),
+                          hull_indices=ends.tobytes(),
+                          hull_list=np.array(hull_list, dtype=np.int32).tobytes(),
+                          light_mesh=light_mesh,
+                          lod_counts=lod_counts if inputs.light_lod is not None else None,
+                          cluster_counts=cluster_counts if inputs.light_clustering is not None else None,
+                          low_res_scale=inputs.light_lod.low_res_scale if inputs.light_lod is not None else 1.)
+
+    def _pack_lights(self, lights: list[PointLight], origin: np.ndarray) -> np.ndarray:
+        # Instance attributes of each light, with its position in scene coordinates.
+        # Each light caches its attributes until it changes.
+        if not lights:
+            return np.zeros((0, _LIGHT_INSTANCE_SIZE), dtype=np.float32)
+        instances = np.stack([light._get_instance() for light in lights])
+        instances[:, 0:2] -= origin
+        return instances.astype(np.float32)
+
+    def _apply_clustering(self, instances: np.ndarray, origin: np.ndarray,
+                          clustering: LightClustering, counts: dict[str, int]) -> np.ndarray:
+        # Lights that may be merged: small, and without animation
+        still = ((instances[:, 9] == 0) & (instances[:, 11] == 0) & (instances[:, 18] == 0)
+                 & (instances[:, 2:6] == instances[:, 13:17]).all(axis=1))
+        mergeable = still & (instances[:, 7] <= clustering.max_radius)
+        if np.count_nonzero(mergeable) < 2:
+            return instances
+        lights = instances[mergeable].astype(np.float64)
+
+        # Group the lights by world cell and color. Shadow casters are only merged together.
+        groups = clustering.group(lights[:, 0:2] + origin, lights[:, 2:6], lights[:, 8])
+        sizes = np.bincount(groups)
+        counts['clustered_lights'] += int(sizes[sizes > 1].sum())
+        counts['clusters'] += int(np.count_nonzero(sizes > 1))
+
+        # Weight each light by the light that it adds onto the lightmap, which grows with
+        # the square of its power and of its radius
+        alpha, power, radius = lights[:, 5], lights[:, 6], lights[:, 7]
+        energy = alpha * power * power * radius * radius
+        weights = np.maximum(energy, 1e-12)
+        total = np.bincount(groups, weights)
+        mean = [np.bincount(groups, weights * lights[:, i]) / total for i in range(6)]
+
+        # Each group becomes a light at its center that encloses its lights and adds the same light
+        _, first = np.unique(groups, return_index=True)
+        merged = lights[first]
+        merged[:, 0:6] = np.stack(mean, axis=1)
+        merged[:, 13:17] = merged[:, 2:6]
+        enclosing = np.zeros(len(merged))
+        np.maximum.at(enclosing, groups, np.hypot(*(lights[:, 0:2] - merged[groups, 0:2]).T) + radius)
+        merged[:, 7] = enclosing
+        merged[:, 6] = np.sqrt(np.bincount(groups, energy)
+                               / np.maximum(merged[:, 5] * enclosing * enclosing, 1e-12))
+
+        return np.concatenate([instances[~mergeable], merged.astype(np.float32)])
+
+    def _apply_lod(self, instances: np.ndarray, size: tuple[float, float],
+                   rect: tuple[int, int, int, int], lod: LightLOD, counts: dict[str, int]):
+        # Radius of each light in lightmap pixels
+        scale = rect[2] * self._lightmap_res[0] / self._native_res[0] / size[0]
+        radius = instances[:, 7] * scale
+
+        # Brightest value that each light adds onto the lightmap, at its center, with
+        # the brighter of its two colors and its power at the top of its pulse
+        color = np.maximum(instances[:, 2:5].max(axis=1) * instances[:, 5],
+                           instances[:, 13:16].max(axis=1) * instances[:, 16])
+        power = instances[:, 6] * (1 + np.abs(instances[:, 11]))
+        intensity = color * power * power
+
+        visible, shadows, low_res = lod.classify(radius, intensity)
+
+        # Drop the shadows of the demoted lights
+        dropped = visible & ~shadows & (instances[:, 8] != 0)
+        instances[dropped, 8] = 0
+
+        low_res &= visible
+        counts['skipped'] += int(np.count_nonzero(~visible))
+        counts['shadows_dropped'] += int(np.count_nonzero(dropped))
+        counts['reduced_resolution'] += int(np.count_nonzero(low_res))
+        return instances[visible & ~low_res], instances[low_res]
+
+    def _build_light_mesh(self, lights: list[PointLight], origin: np.ndarray) -> np.ndarray:
+        # Triangles between the light and each side of its visibility polygon, in
+        # scene coordinates, with the light's attributes in every vertex
+        meshes = [np.zeros((0, 10), dtype=np.float32)]
+        for light in lights:
+            polygon = self.get_visibility_polygon(light) - origin
+            center = np.subtract(light.position, origin)
+
+            vertices = np.empty((len(polygon), 3, 10), dtype=np.float32)
+            vertices[:, 0, 0:2] = center
+            vertices[:, 1, 0:2] = polygon
+            vertices[:, 2, 0:2] = np.roll(polygon, -1, axis=0)
+            vertices[:, :, 2:4] = center
+            vertices[:, :, 4:8] = light._color
+            vertices[:, :, 8] = light.power
+            vertices[:, :, 9] = light.radius
+            meshes.append(vertices.reshape(-1, 10))
+
+        return np.concatenate(meshes)
+
+    def _get_layer(self, layer: DrawLayer | str):
+        if isinstance(layer, str):
+            return self._draw_layers[layer].layer
+        elif layer == DrawLayer.BACKGROUND:
             return self._layer_bg
         elif layer == DrawLayer.FOREGROUND:
             return self._layer_fg
+        elif layer == DrawLayer.OCCLUDER:
+            return self._layer_occ
+        elif layer == DrawLayer.EMISSIVE:
+            return self._layer_em
 
-    def _send_hull_data(self):
-        # Lists with hull vertices and indices
-        vertices = []
-        indices = []
-        for hull in self.hulls:
-            if not hull.enabled:
-                continue
-            vertices += hull.vertices
-            indices.append(len(vertices))
-
+    def _send_hull_data(self, frame: _FrameData):
         # Store hull vertex data in SSBO
-        vertices = [self._point_to_uv(v) for v in vertices]
-        data_v = np.array(vertices, dtype=np.float32).flatten().tobytes()
-        self._prog_light['hullVSSBO'] = data_v
+        self._ssbo_hull_v.write(frame.hull_vertices)
 
         # Store hull vertex indices in SSBO
-        data_ind = np.array(indices, dtype=np.int32).flatten().tobytes()
-        self._prog_light['hullIndSSBO'] = data_ind
-
-    def _render_to_buf_lt(self):
-        # Disable alpha blending to render lights
-        self._graphics.use_alpha_blending(False)
-
-        for light in self.lights:
-            # Skip light if disabled
-            if not light.enabled:
+        self._ssbo_hull_ind.write(frame.hull_indices)
+
+        # Store the hulls of each viewport in SSBO
+        self._ssbo_hull_list.write(frame.hull_list)
+
+    def _get_time(self) -> float:
+        # Time from which the light animations are evaluated
+        if self.time is None:
+            return time.perf_counter() - self._start_time
+        return self.time
+
+    def _get_lightmap_rect(self, rect: tuple[int, int, int, int]) -> tuple[int, int, int, int]:
+        # Region of the lightmap covered by a native region, with its origin at the bottom
+        sx = self._lightmap_res[0] / self._native_res[0]
+        sy = self._lightmap_res[1] / self._native_res[1]
+        x0, x1 = round(rect[0] * sx), round((rect[0] + rect[2]) * sx)
+        y0, y1 = round(rect[1] * sy), round((rect[1] + rect[3]) * sy)
+        return (x0, self._lightmap_res[1] - y1, x1 - x0, y1 - y0)
+
+    def _render_to_buf_lt(self, frame: _FrameData):
+        # Add the lights together with additive blending
+        self._layer_lt.framebuffer.use()
+        self._graphics.use_alpha_blending(True)
+        self.ctx.blend_func = moderngl.ONE, moderngl.ONE
+
+        # Bind this engine's hull buffers, since the shader may be shared
+        self._ssbo_hull_v.bind()
+        self._ssbo_hull_ind.bind()
+        self._ssbo_hull_list.bind()
+
+        # Send uniforms shared by all the lights
+        self._prog_light['time'] = self._get_time()
+        self._prog_light['useOccluderMap'] = self.occluder_shadows
+        self._prog_light['occluderSoftness'] = self.occluder_softness
+        if self.occluder_shadows:
+            self._buf_sdf.tex.use(location=1)
+            self._prog_light.program['occluderMap'].value = 1
+
+        # Send the light meshes of all the viewports at once
+        if frame.light_mesh:
+            self._send_light_mesh(frame.light_mesh)
+
+        for view in frame.views:
+            self._use_view(view)
+
+            if frame.light_mesh:
+                self._render_light_mesh(view)
+            else:
+                self._render_light_instances(view.light_instances, view.num_lights)
+
+        # Add the lights drawn at reduced resolution
+        if any(view.num_low_res_lights for view in frame.views):
+            self._render_low_res_lights(frame)
+
+        # Add the glow of the emissive layer
+        if self.emissive:
+            self._render_emissive(frame)
+
+        # Restore the viewport and the blend function
+        self.ctx.viewport = (0, 0, self._lightmap_res[0], self._lightmap_res[1])
+        self._graphics.use_standard_alpha_mode()
+
+    def _use_view(self, view: _ViewData, scale: float = 1., shader=None):
+        # Restrict rendering to the viewport's region of the lightmap, scaled
+        # for a lightmap of lower resolution
+        x, y, w, h = self._get_lightmap_rect(view.rect)
+        x0, y0 = round(x * scale), round(y * scale)
+        self.ctx.viewport = (x0, y0, round((x + w) * scale) - x0, round((y + h) * scale) - y0)
+
+        # Send uniforms shared by the viewport's lights
+        shader = shader or self._prog_light
+        shader['viewOrigin'] = view.origin
+        shader['viewSize'] = view.size
+        shader['viewRect'] = (x / self._lightmap_res[0], y / self._lightmap_res[1],
+                              w / self._lightmap_res[0], h / self._lightmap_res[1])
+        shader['firstHull'] = view.first_hull
+        shader['numHulls'] = view.num_hulls
+
+    def _render_light_instances(self, light_instances: bytes, num_lights: int):
+        if num_lights == 0:
+            return
+
+        # Send the lights' attributes, orphaning the buffer so that writing
+        # it does not wait for the previous viewport's draw call
+        self._vbo_light_instances.orphan(
+            max(self._vbo_light_instances.size, len(light_instances)))
+        self._vbo_light_instances.write(light_instances)
+
+        # Add all the lights onto the lightmap in one instanced draw call
+        self._vao_quad.render(moderngl.TRIANGLE_STRIP, instances=num_lights)
+
+    def _render_emissive(self, frame: _FrameData):
+        # Create the shader and its vertex array on first use
+        if self._vao_emissive is None:
+            self._prog_emissive = self._make_shader('fragment_emissive.glsl')
+            self._prog_emissive.program['hullVSSBO'].binding = _HULL_V_BINDING
+            self._prog_emissive.program['hullIndSSBO'].binding = _HULL_IND_BINDING
+            self._prog_emissive.program['hullListSSBO'].binding = _HULL_LIST_BINDING
+            self._vao_emissive = self.ctx.vertex_array(
+                self._prog_emissive.program,
+                [(self._vbo_quad, '2f 2f', 'vertexPos', 'vertexTexCoord')])
+
+        # Mipmaps of the emissive layer, read by the wider rings of the glow
+        tex = self._layer_em.texture
+        tex.filter = (moderngl.LINEAR_MIPMAP_LINEAR, moderngl.LINEAR)
+        tex.build_mipmaps()
+        tex.use(location=1)
+        self._prog_emissive.program['emissiveMap'].value = 1
+
+        self._prog_emissive['emissiveRadius'] = self.emissive_radius
+        self._prog_emissive['emissivePower'] = self.emissive_power
+        self._prog_emissive['emissiveShadows'] = self.emissive_shadows
+
+        # Add the glow of each viewport's region in one pass, at lightmap resolution
+        self._layer_lt.framebuffer.use()
+        for view in frame.views:
+            self._use_view(view, shader=self._prog_emissive)
+            self._vao_emissive.render(moderngl.TRIANGLE_STRIP)
+
+    def _render_low_res_lights(self, frame: _FrameData):
+        # Create the reduced resolution lightmap on first use, or when its scale changes.
+        # The scale is the one with which the frame was prepared.
+        scale = frame.low_res_scale
+        res = (max(1, round(self._lightmap_res[0] * scale)),
+               max(1, round(self._lightmap_res[1] * scale)))
+        if self._layer_lt_low is None or self._layer_lt_low.texture.size != res:
+            if self._layer_lt_low is not None:
+                self._layer_lt_low.release()
+            self._layer_lt_low = self._graphics.make_layer(res, components=4, dtype='f2')
+            self._layer_lt_low.texture.filter = (moderngl.LINEAR, moderngl.LINEAR)
+            self._layer_lt_low.texture.repeat_x = False
+            self._layer_lt_low.texture.repeat_y = False
+
+        # Add the lights onto the reduced resolution lightmap
+        self._layer_lt_low.clear(0, 0, 0, 0)
+        self._layer_lt_low.framebuffer.use()
+        for view in frame.views:
+            self._use_view(view, scale=res[0] / self._lightmap_res[0])
+            self._render_light_instances(view.low_res_instances, view.num_low_res_lights)
+
+        # Upscale it onto the lightmap
+        self._graphics.render(self._layer_lt_low.texture, self._layer_lt,
+                              scale=(self._lightmap_res[0] / res[0],
+                                     self._lightmap_res[1] / res[1]))
+
+    def _send_light_mesh(self, light_mesh: bytes):
+        # Create the vertex buffer and array on first use
+        if self._vao_lights is None:
+            self._prog_light_mesh = self._make_shader('fragment_light_mesh.glsl',
+                                                      'vertex_light_mesh.glsl')
+            self._vbo_lights = self.ctx.buffer(reserve=len(light_mesh), dynamic=True)
+            self._vao_lights = self.ctx.vertex_array(
+                self._prog_light_mesh.program,
+                [(self._vbo_lights, '2f 2f 4f 2f', 'vertexPos',
+                  'vertexLightPos', 'vertexLightCol', 'vertexLightParams')])
+
+        # Orphan the vertex buffer, so that writing it does not wait for the GPU
+        self._vbo_lights.orphan(max(self._vbo_lights.size, len(light_mesh)))
+        self._vbo_lights.write(light_mesh)
+
+    def _render_light_mesh(self, view: _ViewData):
+        if view.num_vertices == 0:
+            return
+
+        self._prog_light_mesh['viewOrigin'] = view.origin
+        self._prog_light_mesh['viewSize'] = view.size
+        self._vao_lights.render(moderngl.TRIANGLES, vertices=view.num_vertices,
+                                first=view.first_vertex)
+
+    def _render_draw_layers(self, views: list[tuple]):
+        w, h = self._native_res
+        for named in self._draw_layers.values():
+            if not named.static:
+                # Dynamic layers are drawn in native coordinates, like the background
+                self._graphics.render_from_vertices(
+                    named.layer.texture, self._layer_bg,
+                    [(w, h), (0, h), (0, 0), (w, 0)],
+                    [(0, 0), (w, 0), (0, h), (w, h)])
                 continue
 
-            # Send light uniforms
-            self._prog_light['lightPos'] = self._point_to_uv(
-                light.position)
-            self._prog_light['lightCol'] = light._color
-            self._prog_light['lightPower'] = light.power
-            self._prog_light['radius'] = light.radius
-            self._prog_light['castShadows'] = light.cast_shadows
-            self._prog_light['native_width'] = self._native_res[0]
-            self._prog_light['native_height'] = self._native_res[1]
-
-            # Send number of hulls
-            self._prog_light['numHulls'] = len(self.hulls)
-
-            # Render onto lightmap
-            self._graphics.render(
-                self._buf_lt.tex, self._buf_lt.fbo, shader=self._prog_light)
-
-            # Flip double buffer
-            self._buf_lt.flip()
-
-        # Re-enable alpha blending
+            # Redraw static layers whose region does not cover the views
+            self._update_static_layer(named, views)
+
+            # Show the region of each view in its viewport, with y measured from the texture's bottom
+            for position, size, (rx, ry, rw, rh) in views:
+                x = position[0] - named.origin[0]
+                y = named.layer.height - (position[1] - named.origin[1]) - size[1]
+                self._graphics.render_from_vertices(
+                    named.layer.texture, self._layer_bg,
+                    [(rx + rw, ry + rh), (rx, ry + rh), (rx, ry), (rx + rw, ry)],
+                    [(x, y), (x + size[0], y), (x, y + size[1]), (x + size[0], y + size[1])])
+
+    def _make_named_layer(self, size: tuple[int, int]) -> Layer:
+        layer = self._graphics.make_layer(size, components=4)
+        layer.texture.repeat_x = False
+        layer.texture.repeat_y = False
+        layer.clear(0, 0, 0, 0)
+        return layer
+
+    def _update_static_layer(self, named: _NamedLayer, views: list[tuple]):
+        # Region of the world seen by all the views
+        x0 = min(position[0] for position, _, _ in views)
+        y0 = min(position[1] for position, _, _ in views)
+        x1 = max(position[0] + size[0] for position, size, _ in views)
+        y1 = max(position[1] + size[1] for position, size, _ in views)
+        ox, oy = named.origin
+        if (named.valid and ox <= x0 and oy <= y0 and
+                x1 <= ox + named.layer.width and y1 <= oy + named.layer.height):
+            return
+
+        # Grow the layer if the views, with the margin around them, do not fit in it
+        width = max(named.layer.width, ceil(x1) - floor(x0) + 2 * named.margin[0])
+        height = max(named.layer.height, ceil(y1) - floor(y0) + 2 * named.margin[1])
+        if (width, height) != named.layer.texture.size:
+            max_size = self.ctx.info['GL_MAX_TEXTURE_SIZE']
+            if width > max_size or height > max_size:
+                raise ValueError(f'The views are too far apart for a static draw layer of at most '
+                                 f'{max_size} pixels wide.')
+            filter = named.layer.texture.filter
+            named.layer.release()
+            named.layer = self._make_named_layer((width, height))
+            named.layer.texture.filter = filter
+
+        # Center the covered region on the views, aligned to whole pixels
+        named.origin = (floor(x0) - (named.layer.width - ceil(x1) + floor(x0)) // 2,
+                        floor(y0) - (named.layer.height - ceil(y1) + floor(y0)) // 2)
+        named.layer.clear(0, 0, 0, 0)
+
+        # The draws that rebuild the layer are not recorded, as they are made during the
+        # frame's render and the replay does not redraw static layers
+        recorder, self._recorder = self._recorder, None
+        try:
+            named.draw(named.origin)
+        finally:
+            self._recorder = recorder
+        named.valid = True
+
+    def _render_occluder_sdf(self):
+        # Create the jump flood buffer and shaders on first use
+        if self._buf_sdf is None:
+            self._prog_jfa_seed = self._make_shader('fragment_jfa_seed.glsl')
+            self._prog_jfa = self._make_shader('fragment_jfa.glsl')
+            self._buf_sdf = DoubleBuff(self._graphics, self._lightmap_res,
+                                       components=2, dtype='f4', filter=moderngl.NEAREST)
+
+        # Seed the buffer with the occluder pixels
+        self._graphics.use_alpha_blending(False)
+        self._graphics.render(self._layer_occ.texture, self._buf_sdf.fbo,
+                              scale=(self._lightmap_res[0]/self._native_res[0],
+                                     self._lightmap_res[1]/self._native_res[1]),
+                              shader=self._prog_jfa_seed)
+        self._buf_sdf.flip()
+
+        # Propagate the closest seeds with halving step sizes
+        step = 1
+        while step * 2 < max(self._lightmap_res):
+            step *= 2
+        while step >= 1:
+            self._prog_jfa['stepSize'] = step
+            self._graphics.render(self._buf_sdf.tex, self._buf_sdf.fbo,
+                                  shader=self._prog_jfa)
+            self._buf_sdf.flip()
+            step //= 2
         self._graphics.use_alpha_blending(True)
 
     def _render_aomap(self):
-        # Render light buffer texture to aomap with blur
-        if self.shadow_blur_radius <= 0:
-            self._graphics.render(
-                self._buf_lt.tex, self._layer_ao)
-        else:
-            self._prog_blur['blurRadius'] = self.shadow_blur_radius
-            self._graphics.render(
-                self._buf_lt.tex, self._layer_ao, shader=self._prog_blur)
+        # Render light buffer texture to aomap with blur. The blur shader premultiplies
+        # the colors by their alpha itself, so the aomap needs no clearing or blending.
+        self._graphics.use_alpha_blending(False)
+        self._prog_blur['blurRadius'] = max(self.shadow_blur_radius, 0)
+        self._graphics.render(
+            self._layer_lt.texture, self._layer_ao, shader=self._prog_blur)
+        self._graphics.use_alpha_blending(True)
 
     def _render_background(self):
         self._prog_mask['lightmap'] = self._layer_ao.texture
@@ -407,3 +1456,34 @@ class LightingEngine:
         self._graphics.render(self._layer_fg.texture, self._graphics.screen,
                               scale=(
                                   self._screen_res[0]/self._native_res[0], self._screen_res[1]/self._native_res[1]))
+
+    def _render_composite(self):
+        # Compile the composite shader on first use
+        if self._prog_composite is None:
+            self._prog_composite = self._make_shader('fragment_composite.glsl')
+
+        self._prog_composite['lightmap'] = self._layer_ao.texture
+        self._prog_composite['foreground'] = self._layer_fg.texture
+        self._prog_composite['maxLuminosity'].value = self.max_luminosity
+        self._prog_composite['ambient'].value = self._ambient
+
+        # Every pixel of the screen is overwritten
+        self._graphics.use_alpha_blending(False)
+        self._graphics.render(self._layer_bg.texture,
+                              self._graphics.screen,
+                              scale=(
+                                  self._screen_res[0]/self._native_res[0], self._screen_res[1]/self._native_res[1]),
+                              shader=self._prog_composite)
+        self._graphics.use_alpha_blending(True)
+
+
+def _empty_lod_counts() -> dict[str, int]:
+    return {'skipped': 0, 'shadows_dropped': 0, 'reduced_resolution': 0}
+
+
+def _empty_cluster_counts() -> dict[str, int]:
+    return {'clustered_lights': 0, 'clusters': 0}
+
+
+def _overlaps(a: tuple[float, float, float, float], b: tuple[float, float, float, float]) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
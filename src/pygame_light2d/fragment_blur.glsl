@@ -11,6 +11,13 @@ const float epsilon=.001;
 
 void main()
 {
+    // Copy the lightmap if there is no blur
+    if(blurRadius<=0.){
+        vec4 texColor=texture(imageTexture,fragmentTexCoord);
+        color=vec4(texColor.rgb*texColor.a,texColor.a);
+        return;
+    }
+    
     int kernelSize=int(blurRadius)*2+1;
     vec2 texelSize=1./textureSize(imageTexture,0);
     
@@ -39,5 +46,6 @@ void main()
         }
     }
     
-    color=blurredColor;
+    // Premultiply the color by its alpha
+    color=vec4(blurredColor.rgb*blurredColor.a,blurredColor.a);
 }
@@ -0,0 +1,29 @@
+#version 330 core
+
+in vec2 fragmentTexCoord;
+uniform sampler2D imageTexture;
+
+uniform sampler2D lightmap;
+uniform sampler2D foreground;
+
+uniform vec4 ambient;
+
+uniform float maxLuminosity=2.5f;
+
+out vec4 color;
+
+void main()
+{
+    // Background masked with the lightmap
+    vec4 texcolor=texture(imageTexture,fragmentTexCoord);
+    vec4 lightVal=texture(lightmap,fragmentTexCoord);
+    
+    lightVal=clamp(lightVal,0,maxLuminosity);
+    
+    // Clamped like a color written onto the screen
+    vec4 background=clamp(texcolor*(ambient+lightVal),0.,1.);
+    
+    // Foreground blended over the background
+    vec4 fg=texture(foreground,fragmentTexCoord);
+    color=vec4(fg.rgb*fg.a+background.rgb*background.a*(1.-fg.a),1.);
+}
\ No newline at end of file
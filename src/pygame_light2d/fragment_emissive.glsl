@@ -0,0 +1,123 @@
+#version 330 core
+
+in vec2 fragmentTexCoord;
+
+// View of the viewport being rendered: its top-left corner and size in scene
+// coordinates, and its region of the lightmap (origin, size) in UV coordinates
+uniform vec2 viewOrigin;
+uniform vec2 viewSize;
+uniform vec4 viewRect;
+
+uniform sampler2D emissiveMap;
+uniform float emissiveRadius;
+uniform float emissivePower;
+uniform bool emissiveShadows;
+
+uniform hullVSSBO{
+    float hullV[2048];
+};
+
+uniform hullIndSSBO{
+    int hullInd[256];
+};
+
+// Hulls of the viewport being rendered, as indices into hullInd
+uniform hullListSSBO{
+    int hullList[1024];
+};
+uniform int firstHull;
+uniform int numHulls;
+
+out vec4 color;
+
+const int numRings=4;
+const int numDirections=8;
+const float tau=6.28318531;
+
+vec2 uv_to_scene(vec2 v){
+    return viewOrigin+vec2(v.x,1.-v.y)*viewSize;
+}
+
+bool isOcluded(vec2 p,vec2 q,vec2 a,vec2 b){
+    vec2 v1=q-p;
+    vec2 v2=b-a;
+
+    float crossProduct=v1.x*v2.y-v1.y*v2.x;
+    if(crossProduct==0.){
+        return false;
+    }
+
+    float t=(v2.x*(p.y-a.y)+v2.y*(a.x-p.x))/crossProduct;
+    if(t<0||1<t){
+        return false;// The intersection point is not between p and q
+    }
+
+    float u=(v1.x*(a.y-p.y)+v1.y*(p.x-a.x))/-crossProduct;
+    if(u<0||1<u){
+        return false;// The intersection point is not between a and b
+    }
+    return true;
+}
+
+// Whether a hull blocks the segment between a and b
+bool hullsBlock(vec2 a,vec2 b){
+    for(int k=firstHull;k<firstHull+numHulls;k++){
+        int i=hullList[k];
+        int j0=i>0?hullInd[i-1]:0;
+        int jn=hullInd[i];
+        int n=jn-j0;
+        for(int j=j0;j<jn;j++){
+            int ind1=j*2;
+            int ind2=(((j+1-j0)%n)+j0)*2;
+            vec2 p=vec2(hullV[ind1],hullV[ind1+1]);
+            vec2 q=vec2(hullV[ind2],hullV[ind2+1]);
+            if(isOcluded(p,q,a,b)){
+                return true;
+            }
+        }
+    }
+    return false;
+}
+
+void main()
+{
+    // Emissive map coordinates of the fragment, and of one scene unit
+    vec2 mapCoord=viewRect.xy+fragmentTexCoord*viewRect.zw;
+    vec2 unit=viewRect.zw/viewSize;
+    vec2 texelSize=1./textureSize(emissiveMap,0);
+    vec2 fragmentPos=uv_to_scene(fragmentTexCoord);
+
+    // Emissive color at the fragment
+    vec4 glow=textureLod(emissiveMap,mapCoord,0.);
+    float weightSum=1.;
+
+    // Glow of the emissive pixels around the fragment, sampled on rings with a cubic
+    // falloff. Each ring reads the mip level whose texels match its sample spacing.
+    for(int k=1;k<=numRings;k++){
+        float r=emissiveRadius*float(k)/float(numRings+1);
+        float x=r/emissiveRadius;
+        float w=2*x*x*x-3*x*x+1;
+        vec2 offset=r*unit;
+        float lod=max(log2(r*tau/numDirections*max(unit.x/texelSize.x,unit.y/texelSize.y)),0.);
+        for(int d=0;d<numDirections;d++){
+            float angle=tau*(float(d)+.5*float(k%2))/float(numDirections);
+            vec2 dir=vec2(cos(angle),sin(angle));
+            vec2 sampleCoord=mapCoord+dir*offset;
+            weightSum+=w;
+            if(any(lessThan(sampleCoord,viewRect.xy))||any(greaterThan(sampleCoord,viewRect.xy+viewRect.zw))){
+                continue;
+            }
+
+            // Skip the samples hidden from the fragment by a hull
+            if(emissiveShadows&&hullsBlock(fragmentPos,fragmentPos+vec2(dir.x,-dir.y)*r)){
+                continue;
+            }
+            glow+=textureLod(emissiveMap,sampleCoord,lod)*w;
+        }
+    }
+
+    // Blend like a light
+    vec4 lightVal=glow/weightSum*emissivePower;
+    float alpha=lightVal[3];
+    color=vec4(lightVal.xyz*alpha,alpha);
+}
\ No newline at end of file
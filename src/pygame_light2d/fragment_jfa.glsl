@@ -0,0 +1,39 @@
+#version 330 core
+
+in vec2 fragmentTexCoord;
+uniform sampler2D imageTexture;
+
+uniform float stepSize;
+
+out vec4 color;
+
+void main()
+{
+    vec2 texelSize=1./textureSize(imageTexture,0);
+    
+    // Keep the closest seed among the neighbors at stepSize texels
+    vec2 bestSeed=vec2(-1.);
+    float bestDist=1e20;
+    for(int x=-1;x<=1;++x){
+        for(int y=-1;y<=1;++y){
+            vec2 sampleTexCoord=fragmentTexCoord+vec2(float(x),float(y))*stepSize*texelSize;
+            if(any(lessThan(sampleTexCoord,vec2(0.)))||any(greaterThan(sampleTexCoord,vec2(1.)))){
+                continue;
+            }
+            
+            vec2 seed=texture(imageTexture,sampleTexCoord).xy;
+            if(seed.x<0.){
+                continue;
+            }
+            
+            vec2 diff=(seed-fragmentTexCoord)/texelSize;
+            float dist=dot(diff,diff);
+            if(dist<bestDist){
+                bestDist=dist;
+                bestSeed=seed;
+            }
+        }
+    }
+    
+    color=vec4(bestSeed,0.,1.);
+}
@@ -0,0 +1,18 @@
+#version 330 core
+
+in vec2 fragmentTexCoord;
+uniform sampler2D imageTexture;
+
+out vec4 color;
+
+void main()
+{
+    // Occluder pixels are seeds that store their own coordinates,
+    // and the rest are marked as empty with negative coordinates
+    float alpha=texture(imageTexture,fragmentTexCoord).a;
+    if(alpha>.5){
+        color=vec4(fragmentTexCoord,0.,1.);
+    }else{
+        color=vec4(-1.,-1.,0.,1.);
+    }
+}
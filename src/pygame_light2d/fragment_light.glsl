@@ -1,12 +1,17 @@
 #version 330 core
 
 in vec2 fragmentTexCoord;
-uniform sampler2D imageTexture;
+flat in vec2 lightPos;
+flat in vec4 lightCol;
+flat in float lightPower;
+flat in float radius;
+flat in int castShadows;
 
-uniform int native_width;
-uniform int native_height;
-
-uniform vec2 lightPos;
+// View of the viewport being rendered: its top-left corner and size in scene
+// coordinates, and its region of the lightmap (origin, size) in UV coordinates
+uniform vec2 viewOrigin;
+uniform vec2 viewSize;
+uniform vec4 viewRect;
 
 uniform hullVSSBO{
     float hullV[2048];
@@ -15,47 +20,104 @@ uniform hullVSSBO{
 uniform hullIndSSBO{
     int hullInd[256];
 };
+
+// Hulls of the viewport being rendered, as indices into hullInd
+uniform hullListSSBO{
+    int hullList[1024];
+};
+uniform int firstHull;
 uniform int numHulls;
 
-uniform vec4 lightCol;
-uniform float lightPower;
-uniform float radius;
-uniform bool castShadows;
+uniform bool useOccluderMap;
+uniform sampler2D occluderMap;
+uniform float occluderSoftness;
 
 out vec4 color;
 
-vec2 uv_to_world(vec2 v){
-    return vec2(native_width*v.x,native_height*v.y);
+const int maxTraceSteps=64;
+
+vec2 fragmentPos;
+
+vec2 uv_to_scene(vec2 v){
+    return viewOrigin+vec2(v.x,1.-v.y)*viewSize;
+}
+
+vec2 scene_to_map(vec2 p){
+    vec2 v=(p-viewOrigin)/viewSize;
+    return viewRect.xy+vec2(v.x,1.-v.y)*viewRect.zw;
 }
 
 bool isOcluded(vec2 p,vec2 q){
     vec2 v1=q-p;
-    vec2 v2=lightPos-fragmentTexCoord;
+    vec2 v2=lightPos-fragmentPos;
 
     float crossProduct=v1.x*v2.y-v1.y*v2.x;
     if(crossProduct==0.){
         return false;
     }
     
-    float t=(v2.x*(p.y-fragmentTexCoord.y)+v2.y*(fragmentTexCoord.x-p.x))/crossProduct;
+    float t=(v2.x*(p.y-fragmentPos.y)+v2.y*(fragmentPos.x-p.x))/crossProduct;
     if(t<0||1<t){
         return false;// The intersection point is not between p and q
     }
 
-    float u=(v1.x*(fragmentTexCoord.y-p.y)+v1.y*(p.x-fragmentTexCoord.x))/-crossProduct;
+    float u=(v1.x*(fragmentPos.y-p.y)+v1.y*(p.x-fragmentPos.x))/-crossProduct;
     if(u<0||1<u){
-        return false;// The intersection point is not between fragmentTexCoord and lightPos
+        return false;// The intersection point is not between fragmentPos and lightPos
     }
     return true;
 }
 
+// Distance in scene units to the closest occluder, read from the jump flood map
+float occluderDist(vec2 p){
+    vec2 m=clamp(scene_to_map(p),viewRect.xy,viewRect.xy+viewRect.zw);
+    vec2 seed=texture(occluderMap,m).xy;
+    if(seed.x<0.){
+        return 1e6;
+    }
+    float d=length((seed-m)/viewRect.zw*viewSize);
+    
+    // Seeds of other viewports are never hit, only used as a lower bound of the distance
+    if(any(lessThan(seed,viewRect.xy))||any(greaterThan(seed,viewRect.xy+viewRect.zw))){
+        return max(d,1.);
+    }
+    return d;
+}
+
+// Sphere trace the occluder distance field from the fragment towards the light.
+// Returns the visibility of the light, from 0 (ocluded) to 1.
+float traceOccluders(float dist){
+    if(dist<1.){
+        return 1.;
+    }
+    
+    vec2 dir=(lightPos-fragmentPos)/dist;
+    float visibility=1.;
+    float t=0.;
+    for(int i=0;i<maxTraceSteps&&t<dist;i++){
+        float d=occluderDist(fragmentPos+dir*t);
+        if(d<.5){
+            return 0.;
+        }
+        
+        // Penumbra estimate for soft shadows
+        if(occluderSoftness>0.&&t>0.){
+            visibility=min(visibility,occluderSoftness*d/t);
+        }
+        t+=max(d,1.);
+    }
+    return visibility;
+}
+
 
 void main()
 {
-    color=texture(imageTexture,fragmentTexCoord);
+    // The lights are added together with additive blending
+    color=vec4(0.);
+    fragmentPos=uv_to_scene(fragmentTexCoord);
     
     // Skip if fragment is too far away from light source
-    vec2 diff=uv_to_world(lightPos-fragmentTexCoord);
+    vec2 diff=lightPos-fragmentPos;
     float dist=sqrt(diff.x*diff.x+diff.y*diff.y);
     if(dist>=radius){
         return;
@@ -63,10 +125,10 @@ void main()
     
     // Check if ocluded by a hull
     bool ocluded=false;
-    if(castShadows){
-        int prev=0;
-        for(int i=0;i<numHulls;i++){
-            int j0=prev;
+    if(castShadows!=0){
+        for(int k=firstHull;k<firstHull+numHulls;k++){
+            int i=hullList[k];
+            int j0=i>0?hullInd[i-1]:0;
             int jn=hullInd[i];
             int n=jn-j0;
             for(int j=j0;j<jn;j++){
@@ -79,10 +141,16 @@ void main()
                     break;
                 }
             }
-            prev=hullInd[i];
         }
     }
     
+    // Check if ocluded by the occluder map
+    float visibility=1.;
+    if(castShadows!=0&&useOccluderMap&&!ocluded){
+        visibility=traceOccluders(dist);
+        ocluded=visibility<=0.;
+    }
+    
     // Brighten up if not ocluded
     if(!ocluded){
         // Cubic spline for light intensity
@@ -92,9 +160,9 @@ void main()
         // intensity=sqrt(intensity);
         
         // Blend light color
-        vec4 lightVal=lightCol*intensity*lightPower;
+        vec4 lightVal=lightCol*intensity*lightPower*visibility;
         float alpha=lightVal[3];
-        color+=vec4(lightVal.xyz*alpha,alpha);
+        color=vec4(lightVal.xyz*alpha,alpha);
     }
     
 }
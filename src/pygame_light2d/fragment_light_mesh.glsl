@@ -0,0 +1,28 @@
+#version 330 core
+
+in vec2 fragmentPos;
+flat in vec2 lightPos;
+flat in vec4 lightCol;
+flat in float lightPower;
+flat in float radius;
+
+out vec4 color;
+
+void main()
+{
+    // Skip if fragment is too far away from light source
+    float dist=length(lightPos-fragmentPos);
+    if(dist>=radius){
+        discard;
+    }
+    
+    // Cubic spline for light intensity
+    float a=2/(radius*radius*radius);
+    float b=-3/(radius*radius);
+    float intensity=a*dist*dist*dist+b*dist*dist+1;
+    
+    // Light color, added onto the lightmap
+    vec4 lightVal=lightCol*intensity*lightPower;
+    float alpha=lightVal[3];
+    color=vec4(lightVal.xyz*alpha,alpha);
+}
@@ -1,24 +1,138 @@
+import numbers
+import numpy as np
+
 
 class Hull:
     """
     Represents an area used for defining illuminated regions in the lighting engine.
 
+    The vertices are given in the hull's local space, and placed in the world with the hull's
+    position, rotation and scale. Moving or rotating a hull only changes its transform.
+    The vertices are kept as given, so a list of vertices can still be changed in place.
+    A float array of shape (V, 2) is read without being converted each frame.
+
     Args:
         vertices (list[tuple[float, float]]): List of vertices defining the hull's boundary.
         illuminate_interior (bool, optional): Whether to illuminate the interior of the hull. Default is False.
         enabled (bool, optional): Whether the hull is enabled for rendering. Default is True.
+        position (tuple[float, float], optional): Position of the hull's origin. Default is (0, 0).
+        rotation (float, optional): Rotation angle in degrees. Default is 0.
+        scale (tuple[float, float] | float, optional): Scaling factor. Default is 1.
     """
 
-    def __init__(self, vertices, illuminate_interior=False, enabled=True) -> None:
+    def __init__(self, vertices, illuminate_interior=False, enabled=True,
+                 position=(0., 0.), rotation=0., scale=1.) -> None:
         """
         Initialize a hull.
 
         Args:
-            vertices (list[tuple[float, float]]): List of vertices defining the hull's boundary in native coordinates.
+            vertices (list[tuple[float, float]]): List of vertices defining the hull's boundary in local coordinates.
             illuminate_interior (bool, optional): This feature has not been implemented yet.
             enabled (bool, optional): Whether the hull is enabled for rendering. Default is True.
+            position (tuple[float, float], optional): Position of the hull's origin in world coordinates. Default is (0, 0).
+            rotation (float, optional): Rotation angle in degrees around the hull's origin. Default is 0.
+            scale (tuple[float, float] | float, optional): Scaling factor. Can be a tuple (x, y) or a scalar. Default is 1.
         """
 
         self.vertices = vertices
         self.illuminate_interior = illuminate_interior
         self.enabled = enabled
+        self.position = position
+        self.rotation = rotation
+        self.scale = scale
+
+    def get_world_vertices(self) -> np.ndarray:
+        """
+        Get the vertices of the hull in world coordinates.
+
+        Returns:
+            np.ndarray: Array of shape (V, 2) with the transformed vertices.
+        """
+
+        return world_vertices([self])[0]
+
+    def get_bounds(self) -> tuple[float, float, float, float] | None:
+        """
+        Get the bounding box of the hull.
+
+        Returns:
+            tuple[float, float, float, float] | None: Bounding box (x0, y0, x1, y1) in world coordinates,
+                or None if the hull has no vertices.
+        """
+
+        if len(self.vertices) == 0:
+            return None
+        vertices = self.get_world_vertices()
+        x0, y0 = vertices.min(axis=0)
+        x1, y1 = vertices.max(axis=0)
+        return (x0, y0, x1, y1)
+
+
+def local_vertices(hull: Hull) -> np.ndarray:
+    """
+    Get the vertices of a hull in local coordinates as an array.
+
+    Args:
+        hull (Hull): The hull.
+
+    Returns:
+        np.ndarray: Array of shape (V, 2) with the vertices, which is the hull's own array if it has one.
+    """
+
+    return np.asarray(hull.vertices, dtype=np.float64).reshape(-1, 2)
+
+
+def world_vertices(hulls: list[Hull]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Transform the vertices of a list of hulls into world coordinates, in a single vectorized pass.
+
+    Args:
+        hulls (list[Hull]): The hulls.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Array of shape (V, 2) with the vertices of all the hulls,
+            one hull after another, and array with the number of vertices of each hull.
+    """
+
+    counts = np.array([len(hull.vertices) for hull in hulls], dtype=np.int64)
+    if counts.sum() == 0:
+        return np.zeros((0, 2)), counts
+
+    # Transform of each hull, repeated for each of its vertices
+    transforms = []
+    for hull in hulls:
+        sx, sy = (hull.scale, hull.scale) if isinstance(hull.scale, numbers.Number) else hull.scale
+        transforms.append((hull.position[0], hull.position[1], hull.rotation, sx, sy))
+    x, y, angle, sx, sy = np.array(transforms, dtype=np.float64).repeat(counts, axis=0).T
+
+    # Scale, rotate and translate
+    local = np.concatenate([local_vertices(hull) for hull in hulls])
+    lx, ly = local[:, 0] * sx, local[:, 1] * sy
+    angle = np.radians(angle)
+    cos_a, sin_a = np.cos(angle), np.sin(angle)
+    return np.column_stack([lx * cos_a - ly * sin_a + x,
+                            lx * sin_a + ly * cos_a + y]), counts
+
+
+def hull_bounds(hulls: list[Hull]) -> np.ndarray:
+    """
+    Get the bounding boxes of a list of hulls, in a single vectorized pass.
+
+    Args:
+        hulls (list[Hull]): The hulls.
+
+    Returns:
+        np.ndarray: Array of shape (H, 4) with the bounding box (x0, y0, x1, y1) of each hull.
+            The bounding box of a hull without vertices is NaN, which overlaps no region.
+    """
+
+    vertices, counts = world_vertices(hulls)
+    bounds = np.full((len(hulls), 4), np.nan)
+
+    # Reduce over the hulls with vertices only, as reduceat cannot take empty ranges
+    nonempty = counts > 0
+    if np.any(nonempty):
+        starts = (np.cumsum(counts) - counts)[nonempty]
+        bounds[nonempty] = np.column_stack([np.minimum.reduceat(vertices, starts),
+                                            np.maximum.reduceat(vertices, starts)])
+    return bounds
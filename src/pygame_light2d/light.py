@@ -1,10 +1,20 @@
+import numpy as np
 from pygame_render.util import normalize_color_arguments, denormalize_color
 
+from pygame_light2d.animation import LightAnimation
+
+
+# Animation parameters of the lights that are not animated
+_NO_ANIMATION = LightAnimation()
+
 
 class PointLight:
     """
     Represents a point light source within the lighting engine.
 
+    The light's attributes are packed for the GPU only after they change, so assign
+    them, rather than changing a position list in place.
+
     Args:
         position (tuple[float, float]): Position of the light source.
         power (float, optional): Power of the light source. Default is 1.0.
@@ -17,9 +27,9 @@ class PointLight:
         Initialize a point light source.
 
         Args:
-            position (tuple[float, float]): Position of the light source.
+            position (tuple[float, float]): Position of the light source in world coordinates.
             power (float, optional): Power of the light source. Default is 1.0.
-            radius (float, optional): Radius of the light source in native coordinates. Default is 10.0.
+            radius (float, optional): Radius of the light source in world coordinates. Default is 10.0.
             enabled (bool, optional): Whether the light source is enabled. Default is True.
         """
 
@@ -28,8 +38,15 @@ class PointLight:
         self.radius = radius
         self.enabled = enabled
         self.cast_shadows = True
+        self.animation: LightAnimation | None = None
         self._color = [0., 0., 0., 1.]
 
+    def __setattr__(self, name: str, value) -> None:
+        # Changing the light invalidates its packed attributes
+        object.__setattr__(self, name, value)
+        if name != '_instance':
+            object.__setattr__(self, '_instance', None)
+
     def set_color(self, R: (int | tuple[int]) = 0, G: int = 0, B: int = 0, A: int = 255) -> None:
         """
         Set the color of the point light source.
@@ -52,3 +69,29 @@ class PointLight:
         """
 
         return denormalize_color(self._color)
+
+    def get_bounds(self) -> tuple[float, float, float, float]:
+        """
+        Get the bounding box of the area lit by the point light source, including its orbit if animated.
+
+        Returns:
+            tuple[float, float, float, float]: Bounding box (x0, y0, x1, y1) in world coordinates.
+        """
+
+        x, y = self.position
+        r = self.radius
+        if self.animation is not None:
+            r += abs(self.animation.orbit_radius)
+        return (x - r, y - r, x + r, y + r)
+
+    def _get_instance(self) -> np.ndarray:
+        # Attributes of the light in the layout of the light shader's instances, with its
+        # position in world coordinates. They are packed again only after the light or its
+        # animation changed.
+        animation = self.animation or _NO_ANIMATION
+        if self._instance is None or self._instance[1] != animation._version:
+            instance = np.array((*self.position, *self._color, self.power, self.radius,
+                                 self.cast_shadows, *animation.get_params(self._color)),
+                                dtype=np.float64)
+            self._instance = (instance, animation._version)
+        return self._instance[0]
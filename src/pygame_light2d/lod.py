@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class LightLOD:
+    """
+    Level-of-detail policy that lowers the cost of the lights that contribute little to the image.
+
+    Each light is judged by its radius on the lightmap, in pixels, and by its peak intensity,
+    the brightest value that it adds onto the lightmap. Lights too faint to be seen are skipped,
+    small or faint lights are drawn without shadows, and mid-size lights are drawn onto a
+    lightmap of reduced resolution.
+
+    Set it as the lighting engine's `light_lod`, whose `lod_counts` then hold the number of
+    lights demoted in each way in the last frame. The policy is not used with visibility polygons.
+
+    Args:
+        min_intensity (float, optional): Peak intensity below which a light is skipped. Default is 1/255.
+        shadow_min_radius (float, optional): Radius in lightmap pixels below which a light casts no shadows. Default is 8.
+        shadow_min_intensity (float, optional): Peak intensity below which a light casts no shadows. Default is 0.05.
+        low_res_radius (tuple[float, float], optional): Range of radii in lightmap pixels of the lights drawn
+            at reduced resolution. Default is (16, 64).
+        low_res_scale (float, optional): Scale of the reduced resolution lightmap. Default is 0.5.
+    """
+
+    def __init__(self, min_intensity=1/255, shadow_min_radius=8., shadow_min_intensity=.05,
+                 low_res_radius=(16., 64.), low_res_scale=.5) -> None:
+        """
+        Initialize a level-of-detail policy.
+
+        Args:
+            min_intensity (float, optional): Peak intensity below which a light is skipped. Default is 1/255.
+            shadow_min_radius (float, optional): Radius in lightmap pixels below which a light casts no shadows. Default is 8.
+            shadow_min_intensity (float, optional): Peak intensity below which a light casts no shadows. Default is 0.05.
+            low_res_radius (tuple[float, float], optional): Range [min, max) of radii in lightmap pixels of the lights
+                drawn at reduced resolution. Default is (16, 64).
+            low_res_scale (float, optional): Scale of the reduced resolution lightmap, from 0 to 1. Default is 0.5.
+        """
+
+        self.min_intensity = min_intensity
+        self.shadow_min_radius = shadow_min_radius
+        self.shadow_min_intensity = shadow_min_intensity
+        self.low_res_radius = low_res_radius
+        self.low_res_scale = low_res_scale
+
+    def classify(self, radius: np.ndarray, intensity: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Choose the level of detail of a set of lights.
+
+        Args:
+            radius (np.ndarray): Radius of each light in lightmap pixels.
+            intensity (np.ndarray): Peak intensity of each light.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: Boolean arrays, True for the lights that are drawn,
+                for the lights that may cast shadows, and for the lights drawn at reduced resolution.
+        """
+
+        visible = intensity >= self.min_intensity
+        shadows = (radius >= self.shadow_min_radius) & (intensity >= self.shadow_min_intensity)
+        low_res = (self.low_res_radius[0] <= radius) & (radius < self.low_res_radius[1])
+        return visible, shadows, low_res
@@ -0,0 +1,192 @@
+import numpy as np
+
+from pygame_light2d.hull import Hull, world_vertices
+
+
+# Upper bound on the number of point-edge pairs tested at once
+_MAX_PAIRS = 1 << 22
+
+
+def hull_edges(hulls: list[Hull]) -> np.ndarray:
+    """
+    Get the edges of a list of hulls.
+
+    Args:
+        hulls (list[Hull]): The hulls.
+
+    Returns:
+        np.ndarray: Array of shape (E, 2, 2) with the endpoints of each edge.
+    """
+
+    vertices, counts = world_vertices(hulls)
+    if len(vertices) == 0:
+        return np.zeros((0, 2, 2))
+
+    # Index of the next vertex of each vertex, wrapping around each hull
+    ends = np.cumsum(counts)
+    next_ind = np.arange(len(vertices)) + 1
+    next_ind[ends[counts > 0] - 1] = (ends - counts)[counts > 0]
+
+    return np.stack([vertices, vertices[next_ind]], axis=1)
+
+
+def light_intensity(dist: np.ndarray, radius: float) -> np.ndarray:
+    """
+    Evaluate the falloff of a point light, with the same cubic spline as the light shader.
+
+    Args:
+        dist (np.ndarray): Distances from the light.
+        radius (float): Radius of the light.
+
+    Returns:
+        np.ndarray: Intensity at each distance, 0 at or beyond the radius.
+    """
+
+    a = 2 / (radius * radius * radius)
+    b = -3 / (radius * radius)
+    intensity = a * dist * dist * dist + b * dist * dist + 1
+    return np.where(dist < radius, intensity, 0.)
+
+
+def occluded_by_edges(points: np.ndarray, light_pos: tuple[float, float], edges: np.ndarray) -> np.ndarray:
+    """
+    Test whether the segments from each point to a light cross any edge,
+    with the same intersection test as the light shader.
+
+    Args:
+        points (np.ndarray): Array of shape (N, 2) with the points.
+        light_pos (tuple[float, float]): Position of the light.
+        edges (np.ndarray): Array of shape (E, 2, 2) with the edges, as returned by `hull_edges`.
+
+    Returns:
+        np.ndarray: Boolean array of shape (N,), True where the light is blocked.
+    """
+
+    return segments_occluded(points, np.broadcast_to(light_pos, np.shape(points)), edges)
+
+
+def segments_occluded(points: np.ndarray, light_pos: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Test whether the segments from points to lights cross any edge, with the same intersection
+    test as the light shader. Each point is paired with its own light, so that the point-light
+    pairs of many lights are tested at once.
+
+    Args:
+        points (np.ndarray): Array of shape (K, 2) with the points.
+        light_pos (np.ndarray): Array of shape (K, 2) with the position of the light of each point.
+        edges (np.ndarray): Array of shape (E, 2, 2) with the edges, as returned by `hull_edges`.
+
+    Returns:
+        np.ndarray: Boolean array of shape (K,), True where the light is blocked.
+    """
+
+    occluded = np.zeros(len(points), dtype=bool)
+    if len(points) == 0 or len(edges) == 0:
+        return occluded
+
+    # Segments from the points to the lights, and their bounding boxes
+    seg_min = np.minimum(points, light_pos)
+    seg_max = np.maximum(points, light_pos)
+    edge_min = edges.min(axis=1)
+    edge_max = edges.max(axis=1)
+
+    # Test the edges in chunks to bound the memory use
+    chunk = max(1, _MAX_PAIRS // len(points))
+    for start in range(0, len(edges), chunk):
+        # Only the segment-edge pairs whose bounding boxes overlap can cross
+        lo, hi = edge_min[start:start + chunk], edge_max[start:start + chunk]
+        near = ((seg_min[:, 0:1] <= hi[:, 0]) & (lo[:, 0] <= seg_max[:, 0:1]) &
+                (seg_min[:, 1:2] <= hi[:, 1]) & (lo[:, 1] <= seg_max[:, 1:2]))
+        k, e = np.nonzero(near)
+        e += start
+
+        # Segment-edge pairs
+        fx, fy = points[k, 0], points[k, 1]
+        v2x, v2y = light_pos[k, 0] - fx, light_pos[k, 1] - fy
+        px, py = edges[e, 0, 0], edges[e, 0, 1]
+        v1x, v1y = edges[e, 1, 0] - px, edges[e, 1, 1] - py
+        cross = v1x * v2y - v1y * v2x
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (v2x * (py - fy) + v2y * (fx - px)) / cross
+            u = (v1x * (fy - py) + v1y * (px - fx)) / -cross
+        hit = (cross != 0) & (0 <= t) & (t <= 1) & (0 <= u) & (u <= 1)
+        occluded[k[hit]] = True
+
+    return occluded
+
+
+def visibility_polygon(light_pos: tuple[float, float], radius: float, edges: np.ndarray) -> np.ndarray:
+    """
+    Compute the region visible from a light with an angular sweep of rays.
+
+    Rays are cast towards every edge endpoint, and slightly to each side of it, and stopped
+    at the closest edge or at the square enclosing the light's radius.
+
+    Args:
+        light_pos (tuple[float, float]): Position of the light.
+        radius (float): Radius of the light.
+        edges (np.ndarray): Array of shape (E, 2, 2) with the edges that block the light.
+
+    Returns:
+        np.ndarray: Array of shape (K, 2) with the vertices of the polygon, sorted by angle around the light.
+    """
+
+    x, y = light_pos
+    r = radius
+
+    # Square around the light's area, so that every ray hits something
+    corners = np.array([(x - r, y - r), (x + r, y - r), (x + r, y + r), (x - r, y + r)])
+    box = np.stack([corners, np.roll(corners, -1, axis=0)], axis=1)
+    segments = np.concatenate([edges.reshape(-1, 2, 2), box])
+
+    # Sorted angles of the rays towards the endpoints and to each side of them
+    endpoints = segments.reshape(-1, 2)
+    base = np.arctan2(endpoints[:, 1] - y, endpoints[:, 0] - x)
+    eps = 1e-4
+    angles = np.unique(np.concatenate([base - eps, base, base + eps]))
+    dx, dy = np.cos(angles)[:, None], np.sin(angles)[:, None]
+
+    # Distance along each ray to the closest segment, testing the segments in
+    # chunks to bound the memory use
+    t_min = np.full(len(angles), np.inf)
+    chunk = max(1, _MAX_PAIRS // len(angles))
+    for start in range(0, len(segments), chunk):
+        p = segments[start:start + chunk, 0]
+        q = segments[start:start + chunk, 1]
+        px, py = p[:, 0] - x, p[:, 1] - y
+        ex, ey = q[:, 0] - p[:, 0], q[:, 1] - p[:, 1]
+
+        # Ray-segment pairs, shape (A, S)
+        denom = dx * ey - dy * ex
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (px * ey - py * ex) / denom
+            u = (px * dy - py * dx) / denom
+        hit = (denom != 0) & (t >= 0) & (0 <= u) & (u <= 1)
+        t_min = np.minimum(t_min, np.where(hit, t, np.inf).min(axis=1))
+
+    return np.column_stack([x + dx[:, 0] * t_min, y + dy[:, 0] * t_min])
+
+
+def points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """
+    Test which points are inside a polygon, with the even-odd rule.
+
+    Args:
+        points (np.ndarray): Array of shape (N, 2) with the points.
+        polygon (np.ndarray): Array of shape (K, 2) with the vertices of the polygon.
+
+    Returns:
+        np.ndarray: Boolean array of shape (N,), True for the points inside the polygon.
+    """
+
+    # Point-edge pairs, shape (N, K)
+    px, py = points[:, 0:1], points[:, 1:2]
+    ax, ay = polygon[:, 0], polygon[:, 1]
+    bx, by = np.roll(ax, -1), np.roll(ay, -1)
+
+    # Count the edges crossed by a horizontal ray from each point
+    straddles = (ay > py) != (by > py)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = ax + (py - ay) * (bx - ax) / (by - ay)
+    crossings = straddles & (px < x_cross)
+    return crossings.sum(axis=1) % 2 == 1
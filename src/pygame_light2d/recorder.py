@@ -0,0 +1,431 @@
+import json
+import os
+import struct
+import zlib
+import numpy as np
+import pygame
+
+from pygame_light2d.animation import LightAnimation
+from pygame_light2d.camera import Camera
+from pygame_light2d.clustering import LightClustering
+from pygame_light2d.hull import Hull, local_vertices
+from pygame_light2d.light import PointLight
+from pygame_light2d.lod import LightLOD
+from pygame_light2d.viewport import Viewport
+
+
+# Header of a recording file, followed by the format version
+_MAGIC = b'PL2DREC'
+_VERSION = 1
+
+# Sections of a recorded frame, in the order in which they are written, and their data types
+_SECTIONS = (('settings', np.float64),
+             ('viewports', np.float64),
+             ('lights', np.float64),
+             ('hull_params', np.float64),
+             ('hull_counts', np.int32),
+             ('hull_vertices', np.float64),
+             ('layers', np.uint8),
+             ('draws', np.float64))
+
+# Engine attributes recorded as they are, at the end of the settings
+_ENGINE_SETTINGS = ('shadow_blur_radius', 'max_luminosity', 'occluder_shadows', 'occluder_softness',
+                    'visibility_polygons', 'emissive', 'emissive_radius', 'emissive_power',
+                    'emissive_shadows', 'fused_composite', 'pipelining')
+
+# Names of the built-in draw layers, in the order of their codes. The named
+# draw layers follow, in the engine's order.
+_BUILTIN_LAYERS = ('BACKGROUND', 'FOREGROUND', 'OCCLUDER', 'EMISSIVE')
+
+# Kinds of recorded draw calls
+_DRAW_CLEAR = 0
+_DRAW_TEXTURE = 1
+_DRAW_TRANSFORMED = 2
+
+# Number of parameters of a draw call after its kind, layer and texture (id, width, height)
+_DRAW_PARAMS = 11
+
+
+class SceneRecorder:
+    """
+    Records the per-frame state of a lighting engine into a compact binary log, so that
+    a scene can be replayed and profiled away from the game with `SceneReplay`.
+
+    Each frame stores the lights, hulls, viewports, settings and the draw calls made onto
+    the layers since the previous frame. Every array is delta-encoded against the previous
+    frame, as the XOR of their bytes, and each frame is compressed, so unchanged data costs
+    almost nothing.
+
+    Textures are only recorded by their id and size. The draw callbacks of static draw layers,
+    and the draws that they make, are not recorded, only the layers themselves.
+
+    Use `LightingEngine.start_recording` rather than creating a recorder directly.
+
+    Args:
+        engine (LightingEngine): The recorded lighting engine.
+        file (str | os.PathLike | BinaryIO): Path or binary file to write the recording to.
+    """
+
+    def __init__(self, engine, file) -> None:
+        """
+        Initialize a recorder and write the header of the recording.
+
+        Args:
+            engine (LightingEngine): The recorded lighting engine.
+            file (str | os.PathLike | BinaryIO): Path or binary file to write the recording to.
+                A file given by path is closed by `close`.
+        """
+
+        self.num_frames = 0
+        self._engine = engine
+        self._owns_file = isinstance(file, (str, os.PathLike))
+        self._file = open(file, 'wb') if self._owns_file else file
+
+        # Draw calls of the frame being recorded, and the sections of the previous frame
+        self._draws: list[list[float]] = []
+        self._previous: dict[str, np.ndarray] = {}
+
+        config = json.dumps({'screen_res': list(engine._screen_res),
+                             'native_res': list(engine._native_res),
+                             'lightmap_res': list(engine._lightmap_res)}).encode()
+        self._file.write(_MAGIC + struct.pack('<HI', _VERSION, len(config)) + config)
+
+    def record_clear(self, color: tuple[float, float, float, float]) -> None:
+        """
+        Record a call to `LightingEngine.clear`.
+
+        Args:
+            color (tuple[float, float, float, float]): Normalized clear color.
+        """
+
+        self._add_draw(_DRAW_CLEAR, None, None, color)
+
+    def record_texture(self, tex, layer, dest: pygame.Rect, source: pygame.Rect) -> None:
+        """
+        Record a call to `LightingEngine.render_texture`.
+
+        Args:
+            tex (moderngl.Texture): Rendered texture.
+            layer (DrawLayer | str): Layer rendered onto.
+            dest (pygame.Rect): Destination rectangle.
+            source (pygame.Rect): Source rectangle from the texture.
+        """
+
+        self._add_draw(_DRAW_TEXTURE, layer, tex, (*dest, *source))
+
+    def record_transformed(self, tex, layer, position, scale, angle, flip, section) -> None:
+        """
+        Record a call to `LightingEngine.render_transformed`.
+
+        Args:
+            tex (moderngl.Texture): Rendered texture.
+            layer (DrawLayer | str): Layer rendered onto.
+            position (tuple[float, float]): Position of the texture.
+            scale (tuple[float, float] | float): Scaling factor.
+            angle (float): Rotation angle in degrees.
+            flip (tuple[bool, bool] | bool): Whether to flip the texture.
+            section (pygame.Rect | None): Section of the texture, or None for the entire texture.
+        """
+
+        section = (np.nan,) * 4 if section is None else tuple(section)
+        flip = (flip, False) if isinstance(flip, bool) else flip
+        self._add_draw(_DRAW_TRANSFORMED, layer, tex,
+                       (*position, *np.broadcast_to(scale, 2), angle, *flip, *section))
+
+    def record_frame(self) -> None:
+        """Record the state of the engine for the frame being rendered, with the draw calls made since the previous frame."""
+
+        sections = _snapshot(self._engine, self._draws)
+        self._draws = []
+
+        # Delta-encode each section against the previous frame
+        chunks = []
+        for name, dtype in _SECTIONS:
+            array = np.ascontiguousarray(sections[name], dtype=dtype)
+            previous = self._previous.get(name)
+            delta = previous is not None and previous.shape == array.shape
+            data = array.view(np.uint8)
+            if delta:
+                data = np.bitwise_xor(data, previous.view(np.uint8))
+            chunks.append(struct.pack(f'<BB{array.ndim}I', delta, array.ndim, *array.shape))
+            chunks.append(data.tobytes())
+            self._previous[name] = array
+
+        frame = zlib.compress(b''.join(chunks), 1)
+        self._file.write(struct.pack('<I', len(frame)) + frame)
+        self.num_frames += 1
+
+    def close(self) -> None:
+        """Finish the recording, and close its file if it was given by path."""
+
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def _add_draw(self, kind: int, layer, tex, params) -> None:
+        row = [kind, _layer_code(self._engine, layer)]
+        row += [np.nan] * 3 if tex is None else [tex.glo, *tex.size]
+        row += list(params) + [np.nan] * (_DRAW_PARAMS - len(params))
+        self._draws.append(row)
+
+
+class SceneReplay:
+    """
+    Reads a recording made with `SceneRecorder` and replays its frames on a lighting engine.
+
+    The recorded textures are replaced by opaque white textures of the same size.
+
+    Args:
+        file (str | os.PathLike | BinaryIO): Path or binary file of the recording.
+    """
+
+    def __init__(self, file) -> None:
+        """
+        Open a recording and read its header.
+
+        Args:
+            file (str | os.PathLike | BinaryIO): Path or binary file of the recording.
+
+        Raises:
+            ValueError: If the file is not a recording, or was written by an unsupported version.
+        """
+
+        self._owns_file = isinstance(file, (str, os.PathLike))
+        self._file = open(file, 'rb') if self._owns_file else file
+
+        if self._file.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError('Not a scene recording.')
+        version, config_len = struct.unpack('<HI', self._file.read(6))
+        if version != _VERSION:
+            raise ValueError(f'Unsupported scene recording version: {version}.')
+        config = json.loads(self._file.read(config_len))
+
+        self.screen_res: tuple[int, int] = tuple(config['screen_res'])
+        self.native_res: tuple[int, int] = tuple(config['native_res'])
+        self.lightmap_res: tuple[int, int] = tuple(config['lightmap_res'])
+
+        # Objects reused between the frames applied onto an engine
+        self._lights: list[PointLight] = []
+        self._hulls: list[Hull] = []
+        self._cameras: list[Camera] = []
+        self._textures: dict[tuple, object] = {}
+
+    def __iter__(self):
+        """
+        Iterate over the remaining frames of the recording.
+
+        Yields:
+            dict[str, np.ndarray]: The sections of each frame.
+        """
+
+        previous = {}
+        while header := self._file.read(4):
+            data = zlib.decompress(self._file.read(struct.unpack('<I', header)[0]))
+            frame, offset = {}, 0
+            for name, dtype in _SECTIONS:
+                delta, ndim = struct.unpack_from('<BB', data, offset)
+                shape = struct.unpack_from(f'<{ndim}I', data, offset + 2)
+                offset += 2 + 4 * ndim
+                nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+                raw = np.frombuffer(data, np.uint8, nbytes, offset)
+                offset += nbytes
+                if delta:
+                    raw = np.bitwise_xor(raw, previous[name].view(np.uint8).reshape(-1))
+                frame[name] = previous[name] = raw.view(dtype).reshape(shape)
+            yield frame
+
+    def apply(self, engine, frame: dict[str, np.ndarray]) -> None:
+        """
+        Set the state of a lighting engine to a recorded frame, and repeat the frame's draw calls.
+        Call `LightingEngine.render` afterwards to render the frame.
+
+        Args:
+            engine (LightingEngine): The lighting engine, with the recorded resolutions.
+            frame (dict[str, np.ndarray]): A frame of the recording.
+        """
+
+        self._apply_settings(engine, frame['settings'])
+        self._apply_viewports(engine, frame['viewports'])
+        self._apply_lights(engine, frame['lights'])
+        self._apply_hulls(engine, frame['hull_params'], frame['hull_counts'], frame['hull_vertices'])
+        self._apply_layers(engine, frame['layers'])
+        self._apply_draws(engine, frame['draws'])
+
+    def close(self) -> None:
+        """Close the recording if it was given by path."""
+
+        if self._owns_file:
+            self._file.close()
+
+    def _apply_settings(self, engine, settings: np.ndarray) -> None:
+        engine.time = float(settings[0])
+        engine.set_ambient(_denormalize(settings[1:5]))
+        engine.camera.position = tuple(settings[5:7])
+        engine.camera.size = _optional_tuple(settings[7:9])
+        lod = settings[9:15]
+        engine.light_lod = None if np.isnan(lod[0]) else LightLOD(
+            lod[0], lod[1], lod[2], (lod[3], lod[4]), lod[5])
+        clustering = settings[15:18]
+        engine.light_clustering = None if np.isnan(clustering[0]) else LightClustering(*clustering)
+        for name, value in zip(_ENGINE_SETTINGS, settings[18:]):
+            setattr(engine, name, type(getattr(engine, name))(value))
+
+    def _apply_viewports(self, engine, viewports: np.ndarray) -> None:
+        while len(self._cameras) < len(viewports):
+            self._cameras.append(Camera())
+        engine.viewports = []
+        for camera, row in zip(self._cameras, viewports):
+            camera.position = tuple(row[0:2])
+            camera.size = _optional_tuple(row[2:4])
+            engine.viewports.append(Viewport(camera, tuple(int(v) for v in row[4:8])))
+
+    def _apply_lights(self, engine, rows: np.ndarray) -> None:
+        while len(self._lights) < len(rows):
+            self._lights.append(PointLight((0., 0.)))
+        engine.lights = []
+        engine._light_index.clear()
+        for light, row in zip(self._lights, rows):
+            light.position = (row[0], row[1])
+            light._color = list(row[2:6])
+            light.power, light.radius = row[6], row[7]
+            light.cast_shadows, light.enabled = bool(row[8]), bool(row[9])
+            light.animation = None if not row[11] else LightAnimation(
+                *row[12:16], color=_denormalize(row[16:20]), color_frequency=row[20],
+                orbit_radius=row[21], orbit_frequency=row[22], phase=row[23], seed=int(row[24]))
+            if row[10]:
+                engine.add_light(light)
+            else:
+                engine.lights.append(light)
+
+    def _apply_hulls(self, engine, params: np.ndarray, counts: np.ndarray, vertices: np.ndarray) -> None:
+        while len(self._hulls) < len(params):
+            self._hulls.append(Hull([]))
+        engine.hulls = []
+        engine._hull_index.clear()
+        ends = np.cumsum(counts)
+        for hull, row, end, count in zip(self._hulls, params, ends, counts):
+            hull.vertices = vertices[end - count:end]
+            hull.position = (row[0], row[1])
+            hull.rotation = row[2]
+            hull.scale = (row[3], row[4])
+            hull.enabled = bool(row[5])
+            if row[6]:
+                engine.add_hull(hull)
+            else:
+                engine.hulls.append(hull)
+
+    def _apply_layers(self, engine, layers: np.ndarray) -> None:
+        layers = json.loads(layers.tobytes()) if len(layers) else []
+        names = [name for name, _, _ in layers]
+        for name in list(engine._draw_layers):
+            if name not in names:
+                engine.remove_draw_layer(name)
+        for name, static, margin in layers:
+            if name not in engine._draw_layers:
+                engine.add_draw_layer(name, static=static, draw=_draw_nothing, margin=margin)
+
+    def _apply_draws(self, engine, draws: np.ndarray) -> None:
+        from pygame_light2d.engine import DrawLayer
+
+        named_layers = list(engine._draw_layers)
+        for row in draws:
+            kind, params = int(row[0]), row[5:]
+            if kind == _DRAW_CLEAR:
+                engine.clear(_denormalize(params[:4]))
+                continue
+
+            code = int(row[1])
+            if code < len(_BUILTIN_LAYERS):
+                layer = DrawLayer[_BUILTIN_LAYERS[code]]
+            else:
+                layer = named_layers[code - len(_BUILTIN_LAYERS)]
+            tex = self._get_texture(engine, int(row[2]), (int(row[3]), int(row[4])))
+            if kind == _DRAW_TEXTURE:
+                engine.render_texture(tex, layer, pygame.Rect(*params[0:4]), pygame.Rect(*params[4:8]))
+            elif kind == _DRAW_TRANSFORMED:
+                section = None if np.isnan(params[7]) else pygame.Rect(*params[7:11])
+                engine.render_transformed(tex, layer, tuple(params[0:2]), tuple(params[2:4]), params[4],
+                                          (bool(params[5]), bool(params[6])), section)
+
+    def _get_texture(self, engine, tex_id: int, size: tuple[int, int]):
+        # Stand-in for a recorded texture, created once per id and size
+        key = (tex_id, size)
+        if key not in self._textures:
+            sfc = pygame.Surface(size, pygame.SRCALPHA)
+            sfc.fill((255, 255, 255, 255))
+            self._textures[key] = engine.surface_to_texture(sfc)
+        return self._textures[key]
+
+
+def _snapshot(engine, draws: list[list[float]]) -> dict[str, np.ndarray]:
+    # Sections of a frame with the current state of the engine
+    lod = engine.light_lod
+    lod_params = [np.nan] * 6 if lod is None else [
+        lod.min_intensity, lod.shadow_min_radius, lod.shadow_min_intensity,
+        *lod.low_res_radius, lod.low_res_scale]
+    clustering = engine.light_clustering
+    clustering_params = [np.nan] * 3 if clustering is None else [
+        clustering.cell_size, clustering.color_tolerance, clustering.max_radius]
+    camera = engine.camera
+    settings = [engine._get_time(), *engine._ambient, *camera.position,
+                *_nan_tuple(camera.size), *lod_params, *clustering_params,
+                *[float(getattr(engine, name)) for name in _ENGINE_SETTINGS]]
+
+    viewports = [[*viewport.camera.position, *_nan_tuple(viewport.camera.size), *viewport.rect]
+                 for viewport in engine.viewports]
+
+    lights = [_light_row(light, False) for light in engine.lights]
+    lights += [_light_row(light, True) for light in engine._light_index]
+
+    hulls = [(hull, False) for hull in engine.hulls] + [(hull, True) for hull in engine._hull_index]
+    hull_params = [[*hull.position, hull.rotation, *np.broadcast_to(hull.scale, 2), hull.enabled, indexed]
+                   for hull, indexed in hulls]
+    hull_counts = [len(hull.vertices) for hull, _ in hulls]
+    hull_vertices = [local_vertices(hull) for hull, _ in hulls]
+
+    layers = [[name, named.static, named.margin[0] / engine._native_res[0]]
+              for name, named in engine._draw_layers.items()]
+
+    return {'settings': settings,
+            'viewports': np.reshape(viewports, (-1, 8)),
+            'lights': np.reshape(lights, (-1, 25)),
+            'hull_params': np.reshape(hull_params, (-1, 7)),
+            'hull_counts': hull_counts,
+            'hull_vertices': np.concatenate(hull_vertices) if hull_vertices else np.zeros((0, 2)),
+            'layers': np.frombuffer(json.dumps(layers).encode(), np.uint8) if layers else [],
+            'draws': np.reshape(draws, (-1, 5 + _DRAW_PARAMS))}
+
+
+def _light_row(light: PointLight, indexed: bool) -> list[float]:
+    # Position, color, power, radius, flags and animation of a light
+    animation = light.animation
+    params = (0.,) * 13 if animation is None else animation.get_params(light._color)
+    return [*light.position, *light._color, light.power, light.radius, light.cast_shadows,
+            light.enabled, indexed, animation is not None, *params]
+
+
+def _draw_nothing(origin: tuple[float, float]) -> None:
+    # Stand-in for the draw callback of a static layer, which is not recorded
+    pass
+
+
+def _layer_code(engine, layer) -> float:
+    if layer is None:
+        return np.nan
+    if isinstance(layer, str):
+        return len(_BUILTIN_LAYERS) + list(engine._draw_layers).index(layer)
+    return _BUILTIN_LAYERS.index(layer.name)
+
+
+def _denormalize(color: np.ndarray) -> tuple[float, ...]:
+    # Recorded normalized color in 0-255 scale, without rounding
+    return tuple(float(c) * 255. for c in color)
+
+
+def _nan_tuple(values) -> tuple[float, float]:
+    return (np.nan, np.nan) if values is None else tuple(values)
+
+
+def _optional_tuple(values: np.ndarray) -> tuple[float, float] | None:
+    return None if np.isnan(values[0]) else tuple(values)
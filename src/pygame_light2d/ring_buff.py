@@ -0,0 +1,28 @@
+import moderngl
+
+
+class RingBuff:
+    def __init__(self, ctx: moderngl.Context, nbytes: int, binding: int, size: int = 3) -> None:
+        # Create the buffers. While the GPU may still be reading the buffers
+        # written during the previous frames, the next one is free to write.
+        self._buffers = [ctx.buffer(reserve=nbytes) for _ in range(size)]
+        self._binding = binding
+
+        # The active buffer and its index
+        self._ind = 0
+        self.buf = self._buffers[0]
+
+    # Write data onto the next buffer of the ring and make it the active one
+    def write(self, data: bytes):
+        self._ind = (self._ind + 1) % len(self._buffers)
+        self.buf = self._buffers[self._ind]
+        self.buf.write(data)
+
+    # Bind the active buffer to the uniform block binding
+    def bind(self):
+        self.buf.bind_to_uniform_block(self._binding)
+
+    # Release all the buffers
+    def release(self):
+        for buf in self._buffers:
+            buf.release()
@@ -0,0 +1,140 @@
+from math import floor
+
+
+class SpatialHash:
+    """
+    A uniform grid that indexes objects by their bounding box, used for quickly
+    finding the objects that overlap a region of the world.
+
+    Args:
+        cell_size (float): Side length of the grid cells in world coordinates.
+    """
+
+    def __init__(self, cell_size: float) -> None:
+        """
+        Initialize an empty spatial hash.
+
+        Args:
+            cell_size (float): Side length of the grid cells in world coordinates.
+        """
+
+        self.cell_size = cell_size
+
+        # Objects in each grid cell. Dicts are used as insertion-ordered sets,
+        # so that queries return objects in a deterministic order.
+        self._cells: dict[tuple[int, int], dict] = {}
+
+        # Bounding box (x0, y0, x1, y1) of each indexed object
+        self._bounds: dict[object, tuple[float, float, float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._bounds)
+
+    def __contains__(self, obj) -> bool:
+        return obj in self._bounds
+
+    def __iter__(self):
+        return iter(self._bounds)
+
+    def insert(self, obj, bounds: tuple[float, float, float, float] | None) -> None:
+        """
+        Insert an object into the spatial hash.
+
+        Args:
+            obj: The object to index. Must be hashable.
+            bounds (tuple[float, float, float, float] | None): Bounding box of the object (x0, y0, x1, y1),
+                or None for an object that covers no region, which is kept but never found by queries.
+        """
+
+        if obj in self._bounds:
+            self.remove(obj)
+
+        self._bounds[obj] = bounds
+        for cell in self._cells_in(bounds):
+            self._cells.setdefault(cell, {})[obj] = None
+
+    def remove(self, obj) -> None:
+        """
+        Remove an object from the spatial hash.
+
+        Args:
+            obj: The object to remove.
+
+        Raises:
+            KeyError: If the object is not in the spatial hash.
+        """
+
+        bounds = self._bounds.pop(obj)
+        for cell in self._cells_in(bounds):
+            objs = self._cells[cell]
+            del objs[obj]
+            if not objs:
+                del self._cells[cell]
+
+    def clear(self) -> None:
+        """Remove all the objects from the spatial hash."""
+        self._cells.clear()
+        self._bounds.clear()
+
+    def get_bounds(self, obj) -> tuple[float, float, float, float] | None:
+        """
+        Get the bounding box with which an object was indexed.
+
+        Args:
+            obj: An indexed object.
+
+        Returns:
+            tuple[float, float, float, float] | None: Bounding box of the object (x0, y0, x1, y1), or None.
+        """
+
+        return self._bounds[obj]
+
+    def query(self, bounds: tuple[float, float, float, float]) -> list:
+        """
+        Find the objects whose bounding box overlaps a region.
+
+        Args:
+            bounds (tuple[float, float, float, float]): The region (x0, y0, x1, y1).
+
+        Returns:
+            list: The overlapping objects, each one listed once.
+        """
+
+        x0, y0, x1, y1 = bounds
+
+        # Visit the occupied cells directly if the region spans more cells
+        # than there are occupied ones
+        cx0, cy0, cx1, cy1 = self._cell_range(bounds)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            cells = [objs for (cx, cy), objs in self._cells.items()
+                     if cx0 <= cx <= cx1 and cy0 <= cy <= cy1]
+        else:
+            cells = [self._cells[cell] for cell in self._cells_in(bounds)
+                     if cell in self._cells]
+
+        # Test each candidate's bounding box once
+        checked = set()
+        found = []
+        for objs in cells:
+            for obj in objs:
+                if obj in checked:
+                    continue
+                checked.add(obj)
+                bx0, by0, bx1, by1 = self._bounds[obj]
+                if bx0 <= x1 and x0 <= bx1 and by0 <= y1 and y0 <= by1:
+                    found.append(obj)
+
+        return found
+
+    def _cell_range(self, bounds: tuple[float, float, float, float]):
+        x0, y0, x1, y1 = bounds
+        return (floor(x0 / self.cell_size), floor(y0 / self.cell_size),
+                floor(x1 / self.cell_size), floor(y1 / self.cell_size))
+
+    def _cells_in(self, bounds: tuple[float, float, float, float] | None):
+        if bounds is None:
+            return
+        cx0, cy0, cx1, cy1 = self._cell_range(bounds)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                yield (cx, cy)
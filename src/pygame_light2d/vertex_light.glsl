@@ -0,0 +1,60 @@
+#version 330 core
+
+layout(location=0)in vec2 vertexPos;
+layout(location=1)in vec2 vertexTexCoord;
+
+// Attributes of the light, one per instance
+layout(location=2)in vec2 instanceLightPos;
+layout(location=3)in vec4 instanceLightCol;
+layout(location=4)in vec3 instanceLightParams;// power, radius, cast shadows
+layout(location=5)in vec4 instanceFlickerPulse;// flicker, flicker speed, pulse, pulse frequency
+layout(location=6)in vec4 instanceCycleCol;
+layout(location=7)in vec3 instanceCycleOrbit;// color frequency, orbit radius, orbit frequency
+layout(location=8)in vec2 instancePhaseSeed;
+
+uniform float time;
+
+out vec2 fragmentTexCoord;
+flat out vec2 lightPos;
+flat out vec4 lightCol;
+flat out float lightPower;
+flat out float radius;
+flat out int castShadows;
+
+const float tau=6.28318531;
+
+float hash(float n,float seed){
+    return fract(sin(n*12.9898+seed*78.233)*43758.5453);
+}
+
+// Smooth random value between 0 and 1
+float noise(float x,float seed){
+    float i=floor(x);
+    float f=fract(x);
+    return mix(hash(i,seed),hash(i+1.,seed),f*f*(3.-2.*f));
+}
+
+void main()
+{
+    gl_Position=vec4(vertexPos,0.,1.);
+    fragmentTexCoord=vertexTexCoord;
+
+    float phase=instancePhaseSeed.x;
+    float seed=instancePhaseSeed.y;
+
+    // Circular orbit around the light's position
+    float orbitAngle=tau*(instanceCycleOrbit.z*time+phase);
+    lightPos=instanceLightPos+instanceCycleOrbit.y*vec2(cos(orbitAngle),sin(orbitAngle));
+
+    // Cycle between the light's color and the second color
+    float cycle=.5-.5*cos(tau*(instanceCycleOrbit.x*time+phase));
+    lightCol=mix(instanceLightCol,instanceCycleCol,cycle);
+
+    // Random flicker and sine pulse of the power
+    float flicker=1.-instanceFlickerPulse.x*noise(instanceFlickerPulse.y*time,seed);
+    float pulse=1.+instanceFlickerPulse.z*sin(tau*(instanceFlickerPulse.w*time+phase));
+    lightPower=instanceLightParams.x*max(flicker*pulse,0.);
+
+    radius=instanceLightParams.y;
+    castShadows=int(instanceLightParams.z);
+}
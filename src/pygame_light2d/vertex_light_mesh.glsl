@@ -0,0 +1,28 @@
+#version 330 core
+
+layout(location=0)in vec2 vertexPos;
+layout(location=1)in vec2 vertexLightPos;
+layout(location=2)in vec4 vertexLightCol;
+layout(location=3)in vec2 vertexLightParams;
+
+// Top-left corner and size of the viewport's view in scene coordinates
+uniform vec2 viewOrigin;
+uniform vec2 viewSize;
+
+out vec2 fragmentPos;
+flat out vec2 lightPos;
+flat out vec4 lightCol;
+flat out float lightPower;
+flat out float radius;
+
+void main()
+{
+    // Positions are given in scene coordinates
+    vec2 v=(vertexPos-viewOrigin)/viewSize;
+    gl_Position=vec4(2.*v.x-1.,1.-2.*v.y,0.,1.);
+    fragmentPos=vertexPos;
+    lightPos=vertexLightPos;
+    lightCol=vertexLightCol;
+    lightPower=vertexLightParams.x;
+    radius=vertexLightParams.y;
+}
@@ -0,0 +1,72 @@
+from pygame_light2d.camera import Camera
+
+
+class Viewport:
+    """
+    Represents a region of the screen that shows the world through a camera.
+
+    A lighting engine with several viewports renders all of them in a single call, for
+    split-screen or minimap views. The region is given in native coordinates, and the
+    layers are drawn in native coordinates as usual, so each viewport's content is drawn
+    inside its region.
+
+    Args:
+        camera (Camera): The camera whose view is shown.
+        rect (tuple[int, int, int, int]): Region (x, y, width, height) of the viewport in native coordinates.
+    """
+
+    def __init__(self, camera: Camera, rect: tuple[int, int, int, int]) -> None:
+        """
+        Initialize a viewport.
+
+        Args:
+            camera (Camera): The camera whose view is shown.
+            rect (tuple[int, int, int, int]): Region (x, y, width, height) of the viewport in native coordinates.
+        """
+
+        self.camera = camera
+        self.rect = rect
+
+    def get_view_size(self) -> tuple[float, float]:
+        """
+        Get the size of the camera's view in world coordinates.
+
+        Returns:
+            tuple[float, float]: The camera's size, or the size of the viewport if the camera has none.
+        """
+
+        if self.camera.size is None:
+            return (self.rect[2], self.rect[3])
+        return self.camera.size
+
+    def world_to_native(self, p: tuple[float, float]) -> tuple[float, float]:
+        """
+        Convert a point from world coordinates to native coordinates inside the viewport.
+
+        Args:
+            p (tuple[float, float]): Point in world coordinates.
+
+        Returns:
+            tuple[float, float]: Point in native coordinates.
+        """
+
+        x, y, w, h = self.rect
+        view_w, view_h = self.get_view_size()
+        return (x + (p[0] - self.camera.position[0]) * w / view_w,
+                y + (p[1] - self.camera.position[1]) * h / view_h)
+
+    def native_to_world(self, p: tuple[float, float]) -> tuple[float, float]:
+        """
+        Convert a point from native coordinates inside the viewport to world coordinates.
+
+        Args:
+            p (tuple[float, float]): Point in native coordinates.
+
+        Returns:
+            tuple[float, float]: Point in world coordinates.
+        """
+
+        x, y, w, h = self.rect
+        view_w, view_h = self.get_view_size()
+        return (self.camera.position[0] + (p[0] - x) * view_w / w,
+                self.camera.position[1] + (p[1] - y) * view_h / h)
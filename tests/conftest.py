@@ -0,0 +1,28 @@
+import os
+
+# Create the engines without a visible window unless a video driver is chosen
+os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+
+import pygame
+import pytest
+
+from pygame_light2d.engine import LightingEngine
+
+
+@pytest.fixture(scope='session')
+def graphics():
+    # Window and OpenGL context shared by the lighting engines of the tests
+    pygame.init()
+    try:
+        engine = LightingEngine((160, 90), (160, 90), (80, 45))
+    except Exception as e:
+        pytest.skip(f'No OpenGL context: {e}')
+    yield engine.graphics
+    pygame.quit()
+
+
+@pytest.fixture
+def lights_engine(graphics):
+    engine = LightingEngine((160, 90), (160, 90), (80, 45), graphics=graphics)
+    yield engine
+    engine.shutdown()
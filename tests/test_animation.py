@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from pygame_light2d.animation import LightAnimation
+from pygame_light2d.light import PointLight
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        LightAnimation(flicker=1.5)
+    with pytest.raises(ValueError):
+        LightAnimation(flicker_speed=-1.)
+
+    animation = LightAnimation()
+    with pytest.raises(ValueError):
+        animation.flicker = -.1
+    assert animation.flicker == 0.
+
+
+def test_params_layout():
+    animation = LightAnimation(flicker=.3, flicker_speed=5., pulse=.2, pulse_frequency=2.,
+                               color_frequency=3., orbit_radius=4., orbit_frequency=.5,
+                               phase=.25, seed=7)
+
+    params = animation.get_params([.1, .2, .3, .4])
+
+    assert len(params) == 13
+    assert params == (.3, 5., .2, 2., .1, .2, .3, .4, 3., 4., .5, .25, 7)
+
+
+def test_params_second_color():
+    animation = LightAnimation(color=(255, 0, 51))
+
+    params = animation.get_params([1., 1., 1., 1.])
+
+    np.testing.assert_allclose(params[4:8], (1., 0., .2, 1.))
+
+
+def test_light_packs_changed_animation():
+    light = PointLight((10., 20.), radius=30.)
+    light.animation = LightAnimation(pulse=.2)
+    instance = light._get_instance()
+    assert light._get_instance() is instance
+
+    # Changing the animation packs the light's attributes again
+    light.animation.pulse = .4
+    repacked = light._get_instance()
+    assert repacked is not instance
+    assert .4 in repacked.tolist()
+    assert .2 not in repacked.tolist()
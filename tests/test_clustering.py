@@ -0,0 +1,43 @@
+import numpy as np
+
+from pygame_light2d.clustering import LightClustering
+
+
+def test_group_by_cell_and_color():
+    clustering = LightClustering(cell_size=10., color_tolerance=.25)
+    positions = np.array([(1., 1.), (9., 9.), (11., 1.), (2., 2.), (3., 3.)])
+    colors = np.array([(.6, 0., 0.), (.7, 0., 0.), (.6, 0., 0.), (0., 0., .6), (.6, .1, 0.)])
+
+    groups = clustering.group(positions, colors)
+
+    # Same cell and color bins: 0, 1 and 4. Another cell: 2. Another color: 3.
+    assert groups[0] == groups[1] == groups[4]
+    assert len({groups[0], groups[2], groups[3]}) == 3
+    assert sorted(set(groups)) == [0, 1, 2]
+
+
+def test_group_keeps_flags_apart():
+    clustering = LightClustering()
+    positions = np.zeros((4, 2))
+    colors = np.ones((4, 4))
+
+    groups = clustering.group(positions, colors, flags=np.array([0, 1, 0, 1]))
+
+    assert groups[0] == groups[2]
+    assert groups[1] == groups[3]
+    assert groups[0] != groups[1]
+
+
+def test_group_negative_positions():
+    clustering = LightClustering(cell_size=10.)
+    positions = np.array([(-1., -1.), (1., 1.), (-9., -9.)])
+
+    groups = clustering.group(positions, np.ones((3, 3)))
+
+    assert groups[0] == groups[2] != groups[1]
+
+
+def test_group_no_lights():
+    groups = LightClustering().group(np.zeros((0, 2)), np.zeros((0, 4)))
+
+    assert groups.shape == (0,)
@@ -0,0 +1,95 @@
+import numpy as np
+import pygame
+
+from pygame_light2d import Camera, Viewport
+
+RED = (255, 0, 0, 255)
+GREEN = (0, 255, 0, 255)
+
+
+def _texture(engine, color):
+    sfc = pygame.Surface((10, 10), pygame.SRCALPHA)
+    sfc.fill(color)
+    return engine.surface_to_texture(sfc)
+
+
+def _fill(engine, tex, layer, rect):
+    engine.render_texture(tex, layer, pygame.Rect(rect), pygame.Rect(0, 0, 10, 10))
+
+
+def _background(engine):
+    # Lit background, indexed by native (y, x)
+    pixels = np.frombuffer(engine._layer_bg.texture.read(), np.uint8)
+    return np.flipud(pixels.reshape(engine._native_res[1], engine._native_res[0], 4))
+
+
+def _add_square_layer(engine, calls):
+    # Static layer with a red square from (100, 100) to (110, 110) in world coordinates
+    tex = _texture(engine, RED)
+
+    def draw(origin):
+        calls.append(origin)
+        _fill(engine, tex, 'ground', (100 - origin[0], 100 - origin[1], 10, 10))
+
+    engine.add_draw_layer('ground', static=True, draw=draw)
+
+
+def test_layers_are_composited_in_order(lights_engine):
+    lights_engine.add_draw_layer('a')
+    lights_engine.add_draw_layer('b')
+    lights_engine.clear(0, 0, 0)
+    _fill(lights_engine, _texture(lights_engine, RED), 'a', (0, 0, 160, 90))
+    _fill(lights_engine, _texture(lights_engine, GREEN), 'b', (0, 0, 80, 90))
+    lights_engine.render()
+
+    bg = _background(lights_engine)
+    assert tuple(bg[45, 40]) == GREEN
+    assert tuple(bg[45, 120]) == RED
+
+
+def test_static_layer_is_redrawn_when_needed(lights_engine):
+    calls = []
+    _add_square_layer(lights_engine, calls)
+    lights_engine.render()
+    lights_engine.render()
+    assert len(calls) == 1
+
+    lights_engine.invalidate_draw_layer('ground')
+    lights_engine.render()
+    assert len(calls) == 2
+
+    # Moving within the margin keeps the layer, and moving beyond it redraws it
+    lights_engine.camera.position = (20., -20.)
+    lights_engine.render()
+    assert len(calls) == 2
+    lights_engine.camera.position = (100., 60.)
+    lights_engine.render()
+    assert len(calls) == 3
+    assert tuple(_background(lights_engine)[45, 5]) == RED
+
+
+def test_static_layer_follows_each_viewport(lights_engine):
+    calls = []
+    _add_square_layer(lights_engine, calls)
+    lights_engine.viewports = [Viewport(Camera((60., 60.)), (0, 0, 80, 90)),
+                               Viewport(Camera((95., 95.)), (80, 0, 80, 90))]
+    lights_engine.render()
+
+    bg = _background(lights_engine)
+    assert tuple(bg[45, 45]) == RED
+    assert tuple(bg[10, 90]) == RED
+    assert tuple(bg[10, 45]) != RED
+    assert tuple(bg[45, 90]) != RED
+    assert len(calls) == 1
+
+
+def test_static_layer_zooms_with_the_camera(lights_engine):
+    calls = []
+    _add_square_layer(lights_engine, calls)
+    lights_engine.camera.size = (320., 180.)
+    lights_engine.render()
+
+    bg = _background(lights_engine)
+    assert tuple(bg[52, 52]) == RED
+    assert tuple(bg[58, 58]) != RED
+    assert tuple(bg[47, 47]) != RED
@@ -0,0 +1,44 @@
+import pygame
+import pytest
+
+
+@pytest.fixture
+def texture(lights_engine):
+    tex = lights_engine.make_dynamic_texture(pygame.Surface((100, 50), pygame.SRCALPHA))
+    tex.update()
+    yield tex
+    tex.release()
+
+
+def test_overlapping_rects_are_merged(texture):
+    texture.mark_dirty((0, 0, 10, 10))
+    texture.mark_dirty((50, 0, 10, 10))
+    texture.mark_dirty((5, 5, 50, 2))
+
+    # The last rectangle joins the first two into one
+    assert texture._dirty == [pygame.Rect(0, 0, 60, 10)]
+
+
+def test_disjoint_rects_are_kept(texture):
+    texture.mark_dirty((0, 0, 10, 10))
+    texture.mark_dirty((20, 20, 10, 10))
+
+    assert sorted(texture._dirty) == [pygame.Rect(0, 0, 10, 10), pygame.Rect(20, 20, 10, 10)]
+
+
+def test_rects_are_clipped(texture):
+    texture.mark_dirty((90, 40, 20, 20))
+    texture.mark_dirty((200, 0, 10, 10))
+    texture.mark_dirty((0, 0, 0, 10))
+
+    assert texture._dirty == [pygame.Rect(90, 40, 10, 10)]
+
+
+def test_whole_surface(texture):
+    texture.mark_dirty((10, 10, 5, 5))
+    texture.mark_dirty()
+
+    assert texture._dirty == [pygame.Rect(0, 0, 100, 50)]
+
+    texture.update()
+    assert texture._dirty == []
@@ -0,0 +1,34 @@
+import numpy as np
+
+from pygame_light2d.hull import Hull, hull_bounds, world_vertices
+
+
+def test_world_vertices_apply_the_transform():
+    hull = Hull([(1., 0.), (2., 0.)], position=(10., 20.), rotation=90., scale=(2., 1.))
+
+    vertices, counts = world_vertices([hull, Hull([]), Hull([(0., 0.)])])
+
+    np.testing.assert_allclose(vertices, [(10., 22.), (10., 24.), (0., 0.)], atol=1e-12)
+    np.testing.assert_array_equal(counts, [2, 0, 1])
+
+
+def test_vertices_are_kept_as_given():
+    vertices = [(0., 0.), (10., 0.), (10., 10.)]
+    hull = Hull(vertices)
+    assert hull.vertices is vertices
+
+    # Changes made to the list in place are seen by the hull
+    vertices.append((0., 10.))
+    vertices[1] = (20., 0.)
+    hull.vertices[0] = (-5., -5.)
+    assert hull.get_bounds() == (-5., -5., 20., 10.)
+
+
+def test_hull_bounds_with_empty_hulls():
+    hulls = [Hull([]), Hull([(0., 0.), (4., 2.)], position=(1., 1.)), Hull([])]
+
+    bounds = hull_bounds(hulls)
+
+    assert np.isnan(bounds[0]).all() and np.isnan(bounds[2]).all()
+    np.testing.assert_allclose(bounds[1], (1., 1., 5., 3.))
+    assert hulls[0].get_bounds() is None
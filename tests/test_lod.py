@@ -0,0 +1,30 @@
+import numpy as np
+
+from pygame_light2d.lod import LightLOD
+
+
+def test_classify_thresholds():
+    lod = LightLOD(min_intensity=.01, shadow_min_radius=8., shadow_min_intensity=.05)
+    radius = np.array([4., 8., 32., 32.])
+    intensity = np.array([.5, .5, .005, .02])
+
+    visible, shadows, _ = lod.classify(radius, intensity)
+
+    assert visible.tolist() == [True, True, False, True]
+    assert shadows.tolist() == [False, True, False, False]
+
+
+def test_classify_low_res_range():
+    lod = LightLOD(low_res_radius=(16., 64.))
+    radius = np.array([15.9, 16., 40., 63.9, 64.])
+
+    _, _, low_res = lod.classify(radius, np.ones(5))
+
+    # The range includes its minimum and excludes its maximum
+    assert low_res.tolist() == [False, True, True, True, False]
+
+
+def test_classify_no_lights():
+    visible, shadows, low_res = LightLOD().classify(np.zeros(0), np.zeros(0))
+
+    assert visible.shape == shadows.shape == low_res.shape == (0,)
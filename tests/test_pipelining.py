@@ -0,0 +1,37 @@
+from pygame_light2d.hull import Hull
+from pygame_light2d.light import PointLight
+from pygame_light2d.lod import LightLOD
+
+
+def _add_scene(engine):
+    # A light of 30 lightmap pixels, drawn at reduced resolution by the default policy
+    light = PointLight((80., 45.), radius=60.)
+    light.set_color(255, 255, 255, 255)
+    engine.lights.append(light)
+    engine.hulls.append(Hull([(100., 40.), (110., 40.), (110., 50.)]))
+
+
+def test_light_lod_changes_between_pipelined_renders(lights_engine):
+    _add_scene(lights_engine)
+    lights_engine.pipelining = True
+    lights_engine.light_lod = LightLOD(low_res_scale=.5)
+    lights_engine.render()
+
+    # The frame prepared with the policy is drawn after the policy is removed
+    lights_engine.light_lod = None
+    lights_engine.render()
+    assert lights_engine.lod_counts['reduced_resolution'] == 1
+    assert lights_engine._layer_lt_low.texture.size == (40, 22)
+
+    # The frame prepared without it is drawn after it is set again
+    lights_engine.light_lod = LightLOD(low_res_scale=.25)
+    lights_engine.render()
+    assert lights_engine.lod_counts['reduced_resolution'] == 0
+
+    # A frame is upscaled with the scale it was prepared with
+    lights_engine.light_lod.low_res_scale = .5
+    lights_engine.render()
+    assert lights_engine.lod_counts['reduced_resolution'] == 1
+    assert lights_engine._layer_lt_low.texture.size == (20, 11)
+    lights_engine.render()
+    assert lights_engine._layer_lt_low.texture.size == (40, 22)
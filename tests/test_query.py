@@ -0,0 +1,68 @@
+import numpy as np
+
+from pygame_light2d.hull import Hull
+from pygame_light2d.query import (hull_edges, occluded_by_edges, points_in_polygon, segments_occluded,
+                                  visibility_polygon)
+
+
+def _square(x0, y0, x1, y1):
+    return Hull([(x0, y0), (x1, y0), (x1, y1), (x0, y1)])
+
+
+def test_hull_edges_wrap_around_each_hull():
+    edges = hull_edges([_square(0, 0, 1, 1), Hull([]), _square(5, 5, 6, 6)])
+
+    assert edges.shape == (8, 2, 2)
+    np.testing.assert_allclose(edges[3], [(0, 1), (0, 0)])
+    np.testing.assert_allclose(edges[4], [(5, 5), (6, 5)])
+    np.testing.assert_allclose(edges[7], [(5, 6), (5, 5)])
+
+
+def test_hull_edges_of_no_vertices():
+    assert hull_edges([Hull([])]).shape == (0, 2, 2)
+
+
+def test_occluded_by_edges():
+    edges = hull_edges([_square(40, -10, 60, 10)])
+    points = np.array([(100., 0.), (100., 50.), (20., 0.), (50., 30.)])
+
+    occluded = occluded_by_edges(points, (0., 0.), edges)
+
+    np.testing.assert_array_equal(occluded, [True, False, False, False])
+
+
+def test_segments_occluded_pairs_each_point_with_its_light():
+    edges = hull_edges([_square(40, -10, 60, 10)])
+    points = np.array([(100., 0.), (100., 0.), (50., 50.)])
+    lights = np.array([(0., 0.), (100., 50.), (50., -50.)])
+
+    np.testing.assert_array_equal(segments_occluded(points, lights, edges), [True, False, True])
+
+
+def test_occluded_by_no_edges():
+    points = np.array([(1., 2.), (3., 4.)])
+
+    assert not occluded_by_edges(points, (0., 0.), np.zeros((0, 2, 2))).any()
+
+
+def test_visibility_polygon_without_edges_is_the_light_square():
+    polygon = visibility_polygon((10., 20.), 5., np.zeros((0, 2, 2)))
+
+    assert np.all(np.abs(polygon - (10., 20.)) <= 5. + 1e-9)
+    points = np.array([(10., 20.), (14., 24.), (6., 16.), (16., 20.)])
+    np.testing.assert_array_equal(points_in_polygon(points, polygon), [True, True, True, False])
+
+
+def test_visibility_polygon_agrees_with_occlusion():
+    hulls = [_square(40, -10, 60, 10), _square(-30, 20, -20, 60)]
+    edges = hull_edges(hulls)
+    polygon = visibility_polygon((0., 0.), 100., edges)
+
+    # Points outside the hulls and within the light's square are visible
+    # exactly when they are not occluded, up to the rays' resolution
+    points = np.random.default_rng(0).uniform(-95., 95., size=(500, 2))
+    outside = ~np.any([points_in_polygon(points, hull.get_world_vertices()) for hull in hulls], axis=0)
+    visible = points_in_polygon(points, polygon)
+    occluded = occluded_by_edges(points, (0., 0.), edges)
+
+    assert np.mean(visible[outside] != occluded[outside]) > .99
@@ -0,0 +1,29 @@
+import numpy as np
+
+from pygame_light2d.hull import Hull
+from pygame_light2d.light import PointLight
+
+
+def test_query_light_matches_the_rendered_lightmap(lights_engine):
+    warm = PointLight((40., 45.), power=1., radius=70.)
+    warm.set_color(255, 200, 100, 255)
+    blue = PointLight((120., 30.), power=.6, radius=50.)
+    blue.set_color(100, 100, 255, 200)
+    lights_engine.lights += [warm, blue]
+    lights_engine.hulls.append(Hull([(70., 30.), (80., 30.), (80., 60.), (70., 60.)]))
+    lights_engine.shadow_blur_radius = 0
+    lights_engine.render()
+
+    # Unblurred lightmap, indexed by lightmap (y, x), with the native resolution twice as large
+    lightmap = np.frombuffer(lights_engine._layer_ao.texture.read(), np.float16)
+    lightmap = np.flipud(lightmap.reshape(45, 80, 4)).astype(np.float64)
+
+    # Lit by both lights, by one, in the shadow of the hull, and by no light
+    pixels = np.array([(10, 22), (30, 10), (60, 15), (50, 22), (55, 30), (79, 44)])
+    illumination, occluded = lights_engine.query_light(pixels * 2 + 1.)
+
+    np.testing.assert_allclose(illumination, lightmap[pixels[:, 1], pixels[:, 0]], atol=2e-3)
+    np.testing.assert_array_equal(occluded, [(False, False), (False, False), (False, False),
+                                             (True, False), (False, False), (False, False)])
+    assert illumination[3, 3] < illumination[0, 3]
+    assert not illumination[5].any()
@@ -0,0 +1,110 @@
+import io
+
+import numpy as np
+import pygame
+
+from pygame_light2d import Camera, Viewport
+from pygame_light2d.animation import LightAnimation
+from pygame_light2d.engine import DrawLayer, LightingEngine
+from pygame_light2d.hull import Hull
+from pygame_light2d.light import PointLight
+from pygame_light2d.lod import LightLOD
+from pygame_light2d.recorder import SceneReplay
+
+# Region that contains the whole scene
+_WORLD = (-1e6, -1e6, 1e6, 1e6)
+
+
+def _build_scene(engine):
+    engine.time = 1.5
+    engine.set_ambient(30, 40, 50, 255)
+    engine.light_lod = LightLOD(low_res_scale=.25)
+
+    light = PointLight((20., 30.), power=.8, radius=60.)
+    light.set_color(255, 128, 0, 255)
+    engine.lights.append(light)
+
+    animated = PointLight((70., 40.), radius=40.)
+    animated.set_color(0, 255, 64, 255)
+    animated.animation = LightAnimation(flicker=.3, pulse=.2, color=(0, 0, 255), seed=7)
+    engine.add_light(animated)
+
+    engine.hulls.append(Hull([(40., 10.), (60., 10.), (60., 30.)]))
+    engine.add_hull(Hull([(0., 0.), (10., 0.), (10., 10.), (0., 10.)], position=(100., 50.), rotation=30.))
+    return light, animated
+
+
+def _state(engine):
+    # Recorded state of an engine, read through its public attributes
+    lights = [(*light.position, *light.get_color(), light.power, light.radius, light.cast_shadows,
+               *(() if light.animation is None else
+                 (light.animation.flicker, light.animation.pulse, light.animation.seed)))
+              for light in engine.query_lights(_WORLD)]
+    hulls = [(*np.reshape(hull.vertices, -1), *hull.position, hull.rotation)
+             for hull in engine.query_hulls(_WORLD)]
+    viewports = [(*viewport.camera.position, *viewport.rect) for viewport in engine.viewports]
+    settings = (engine.time, *engine.get_ambient(), *engine.camera.position,
+                engine.light_lod.low_res_scale, engine.shadow_blur_radius)
+    return [np.array(row, dtype=np.float64) for row in [settings, *lights, *hulls, *viewports]]
+
+
+def test_replay_restores_the_recorded_frames(graphics, lights_engine):
+    light, animated = _build_scene(lights_engine)
+
+    # Record a few frames, changing the scene between them
+    file = io.BytesIO()
+    recorder = lights_engine.start_recording(file)
+    expected = []
+    for i in range(3):
+        expected.append(_state(lights_engine))
+        lights_engine.render()
+        light.position = (20. + i, 30.)
+        animated.animation.flicker = .1 * i
+        lights_engine.camera.position = (i, -i)
+        lights_engine.shadow_blur_radius = i
+        if i == 1:
+            lights_engine.viewports = [Viewport(Camera((5., 5.)), (0, 0, 80, 90))]
+    lights_engine.stop_recording()
+    assert recorder.num_frames == 3
+
+    # Applying each replayed frame restores the state in which it was recorded
+    file.seek(0)
+    replay = SceneReplay(file)
+    assert (replay.screen_res, replay.native_res, replay.lightmap_res) == ((160, 90), (160, 90), (80, 45))
+    other = LightingEngine(replay.screen_res, replay.native_res, replay.lightmap_res, graphics=graphics)
+    frames = list(replay)
+    assert len(frames) == 3
+    for frame, state in zip(frames, expected):
+        replay.apply(other, frame)
+        replayed = _state(other)
+        assert len(replayed) == len(state)
+        for replayed_row, row in zip(replayed, state):
+            np.testing.assert_allclose(replayed_row, row, rtol=1e-6)
+
+
+def test_static_layer_draws_are_not_recorded(graphics, lights_engine):
+    tex = lights_engine.surface_to_texture(pygame.Surface((8, 8)))
+    rect = pygame.Rect(0, 0, 8, 8)
+    lights_engine.add_draw_layer('ground', static=True,
+                                 draw=lambda origin: lights_engine.render_texture(tex, 'ground', rect, rect))
+
+    # The static layer is drawn during the first render, and the second frame only clears
+    file = io.BytesIO()
+    lights_engine.start_recording(file)
+    lights_engine.clear(0, 0, 0)
+    lights_engine.render_texture(tex, DrawLayer.FOREGROUND, rect, rect)
+    lights_engine.render()
+    lights_engine.clear(0, 0, 0)
+    lights_engine.render()
+    lights_engine.stop_recording()
+
+    # Replaying the frames repeats only the draws made by the game
+    file.seek(0)
+    replay = SceneReplay(file)
+    other = LightingEngine(replay.screen_res, replay.native_res, replay.lightmap_res, graphics=graphics)
+    drawn = []
+    other.render_texture = lambda tex, layer, dest, source: drawn[-1].append(layer)
+    for frame in replay:
+        drawn.append([])
+        replay.apply(other, frame)
+    assert drawn == [[DrawLayer.FOREGROUND], []]
@@ -0,0 +1,46 @@
+from pygame_light2d.spatial import SpatialHash
+
+
+def test_query_finds_overlapping_objects():
+    index = SpatialHash(10.)
+    index.insert('a', (0., 0., 5., 5.))
+    index.insert('b', (20., 20., 45., 25.))
+    index.insert('c', (-30., -30., -25., -25.))
+
+    assert index.query((4., 4., 21., 21.)) == ['a', 'b']
+    assert index.query((40., 0., 50., 30.)) == ['b']
+    assert index.query((6., 6., 19., 19.)) == []
+
+
+def test_query_lists_objects_spanning_cells_once():
+    index = SpatialHash(1.)
+    index.insert('wide', (0., 0., 50., 50.))
+
+    assert index.query((-100., -100., 100., 100.)) == ['wide']
+    assert index.query((10., 10., 12., 12.)) == ['wide']
+
+
+def test_insert_moves_and_remove_forgets():
+    index = SpatialHash(10.)
+    index.insert('a', (0., 0., 5., 5.))
+    index.insert('a', (100., 100., 105., 105.))
+
+    assert index.query((0., 0., 5., 5.)) == []
+    assert index.query((100., 100., 101., 101.)) == ['a']
+    assert len(index) == 1
+
+    index.remove('a')
+    assert index.query((100., 100., 101., 101.)) == []
+    assert 'a' not in index
+
+
+def test_objects_without_bounds_are_never_found():
+    index = SpatialHash(10.)
+    index.insert('empty', None)
+
+    assert 'empty' in index
+    assert index.get_bounds('empty') is None
+    assert index.query((-1e6, -1e6, 1e6, 1e6)) == []
+
+    index.remove('empty')
+    assert len(index) == 0